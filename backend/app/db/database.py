@@ -1,18 +1,117 @@
-from typing import AsyncGenerator
+import time
+from typing import Any, AsyncGenerator, Dict, Tuple, Type
 
-from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy import exc
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 
 from app.config import get_settings
+from app.services.metrics import Histogram
 
 settings = get_settings()
 
-engine = create_async_engine(settings.database_url, echo=False)
+# 取连接等待时间分桶（毫秒）
+CHECKOUT_WAIT_BUCKETS_MS = (1, 5, 10, 50, 100, 500, 1000, 5000)
+
+
+class PoolMetrics:
+    """连接池取连接的等待时间与超时次数"""
+
+    def __init__(self):
+        self.checkout_wait_ms = Histogram(CHECKOUT_WAIT_BUCKETS_MS)
+        self.timeouts = 0
+
+
+def _instrumented_pool_class() -> Tuple[Type[AsyncAdaptedQueuePool], PoolMetrics]:
+    """
+    生成记录取连接等待时间的连接池类
+
+    每个 engine 一个子类：连接池重建（dispose）时按类重新创建，指标不会丢。
+    """
+    metrics = PoolMetrics()
+
+    class InstrumentedPool(AsyncAdaptedQueuePool):
+        def _do_get(self):
+            start = time.perf_counter()
+            try:
+                return super()._do_get()
+            except exc.TimeoutError:
+                metrics.timeouts += 1
+                raise
+            finally:
+                metrics.checkout_wait_ms.observe((time.perf_counter() - start) * 1000)
+
+    return InstrumentedPool, metrics
+
+
+def _create_engine(url: str) -> Tuple[AsyncEngine, PoolMetrics]:
+    pool_class, metrics = _instrumented_pool_class()
+    connect_args = {}
+    if make_url(url).drivername == "postgresql+asyncpg":
+        # asyncpg 按连接缓存预编译语句，重复的查询省去解析/规划
+        connect_args["prepared_statement_cache_size"] = settings.db_statement_cache_size
+
+    engine = create_async_engine(
+        url,
+        echo=False,
+        poolclass=pool_class,
+        pool_size=settings.db_pool_size,
+        max_overflow=settings.db_max_overflow,
+        pool_timeout=settings.db_pool_timeout,
+        pool_recycle=settings.db_pool_recycle,
+        pool_pre_ping=settings.db_pool_pre_ping,
+        connect_args=connect_args,
+    )
+    return engine, metrics
+
+
+engine, _pool_metrics = _create_engine(settings.database_url)
 AsyncSessionLocal = async_sessionmaker(bind=engine, expire_on_commit=False)
 
+# 只读从库：未配置时与主库共用同一个 engine
+if settings.database_read_url:
+    read_engine, _read_pool_metrics = _create_engine(settings.database_read_url)
+else:
+    read_engine, _read_pool_metrics = engine, None
+AsyncReadSessionLocal = async_sessionmaker(bind=read_engine, expire_on_commit=False)
+
 Base = declarative_base()
 
 
 async def get_db() -> AsyncGenerator[AsyncSession, None]:
     async with AsyncSessionLocal() as session:
         yield session
+
+
+async def get_read_db() -> AsyncGenerator[AsyncSession, None]:
+    """只读查询用的会话（配置了从库时走从库，可能有少量复制延迟）"""
+    async with AsyncReadSessionLocal() as session:
+        yield session
+
+
+async def dispose_engines() -> None:
+    await engine.dispose()
+    if read_engine is not engine:
+        await read_engine.dispose()
+
+
+def _pool_stats(engine: AsyncEngine, metrics: PoolMetrics) -> Dict[str, Any]:
+    pool = engine.pool
+    return {
+        "size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "checked_in": pool.checkedin(),
+        "overflow": max(0, pool.overflow()),  # 超出 pool_size 的临时连接数
+        "timeouts": metrics.timeouts,
+        "checkout_wait_ms": metrics.checkout_wait_ms.snapshot(),
+    }
+
+
+def pool_stats() -> Dict[str, Any]:
+    """连接池占用与取连接等待时间"""
+    return {
+        "primary": _pool_stats(engine, _pool_metrics),
+        "read": _pool_stats(read_engine, _read_pool_metrics) if _read_pool_metrics else None,
+    }
@@ -0,0 +1,28 @@
+"""
+数据库结构迁移
+
+表结构由 backend/migrations 下的 alembic 版本脚本维护。
+命令行：alembic upgrade head；开启 DB_AUTO_MIGRATE 时应用启动时自动执行。
+"""
+
+from alembic import command
+from alembic.config import Config
+
+from app.config import BACKEND_DIR
+from app.db.database import engine
+
+
+def alembic_config() -> Config:
+    return Config(str(BACKEND_DIR / "alembic.ini"))
+
+
+def _upgrade(connection) -> None:
+    config = alembic_config()
+    config.attributes["connection"] = connection
+    command.upgrade(config, "head")
+
+
+async def run_migrations() -> None:
+    """升级到最新版本（多个 worker 同时启动时由咨询锁串行，只有一个真正执行）"""
+    async with engine.begin() as conn:
+        await conn.run_sync(_upgrade)
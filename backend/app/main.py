@@ -1,19 +1,62 @@
+import asyncio
 from contextlib import asynccontextmanager
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 
 from app.routers import auth, progress, speech
-from app.db.database import engine, Base
+from app.db.database import dispose_engines, pool_stats
+from app.db.migrate import run_migrations
 from app.config import get_settings
+from app.services.audio_store import close_audio_store
+from app.services.letters import LETTERS_ETAG, LETTERS_JSON, LETTERS_JSON_GZIP
+from app.services.result_cache import get_result_cache
+from app.services.speech_router import close_speech_router, get_speech_router
+from app.services.transcode_queue import close_transcode_queue, get_transcode_queue
+from app.services.user_cache import get_user_cache
+from app.services.user_versions import etag_matches, get_user_versions, not_modified_response
+from app.services.whisper_speech import get_speech_evaluator
+
+
+settings = get_settings()
+
+
+async def warmup_whisper():
+    """后台预热 Whisper 模型，失败时只记录日志，之后的请求仍会按需加载"""
+    evaluator = get_speech_evaluator()
+    try:
+        await evaluator.executor.run(evaluator.warmup, timeout=0)
+        print("Whisper 模型预热完成")
+    except Exception as e:
+        print(f"Whisper 模型预热失败: {e}")
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
+    if settings.db_auto_migrate:
+        await run_migrations()
+
+    warmup_task = None
+    if settings.whisper_warmup:
+        warmup_task = asyncio.create_task(warmup_whisper())
+
+    transcode_queue = get_transcode_queue()
+    if transcode_queue is not None:
+        transcode_queue.start()
+
     yield
 
+    if warmup_task is not None:
+        warmup_task.cancel()
+    await close_speech_router()
+    await close_transcode_queue()
+    await close_audio_store()
+    get_speech_evaluator().executor.shutdown()
+    get_speech_evaluator().decode_executor.shutdown()
+    auth.password_executor.shutdown()
+    await dispose_engines()
+
 
 app = FastAPI(
     title="儿童英语学习API",
@@ -51,38 +94,66 @@ async def health_check():
     return {"status": "healthy"}
 
 
+@app.get("/api/ready")
+async def readiness_check():
+    """
+    就绪探针：开启预热时，模型加载并空跑完成前返回503，
+    负载均衡据此不把流量发给冷启动的 worker。
+    未开启预热时模型按需加载，与健康检查一致。
+    """
+    if settings.whisper_warmup and not get_speech_evaluator().is_ready:
+        return JSONResponse(status_code=503, content={"status": "loading"})
+    return {"status": "ready"}
+
+
+@app.get("/api/metrics")
+async def metrics():
+    """运行指标（后端调度、推理队列、微批、缓存、条件请求、密码哈希、录音转码、数据库连接池等）"""
+    evaluator = get_speech_evaluator()
+    cache = get_result_cache()
+    user_cache = get_user_cache()
+    user_versions = get_user_versions()
+    transcode_queue = get_transcode_queue()
+    return {
+        "speech_router": get_speech_router().stats(),
+        "whisper_executor": evaluator.executor.stats(),
+        "audio_decode_executor": evaluator.decode_executor.stats(),
+        "password_executor": auth.password_executor.stats(),
+        "whisper_batching": evaluator.batcher.stats() if evaluator.batcher else None,
+        "result_cache": cache.stats() if cache else None,
+        "user_cache": user_cache.stats() if user_cache else None,
+        "etag": user_versions.stats() if user_versions else None,
+        "transcode": transcode_queue.stats() if transcode_queue else None,
+        "transcode_executor": transcode_queue.executor.stats() if transcode_queue else None,
+        "db_pool": pool_stats(),
+    }
+
+
+# 字母表只在发版时变化，缓存期内浏览器直接使用本地副本，不再请求
+LETTERS_CACHE_CONTROL = f"public, max-age={settings.letters_cache_max_age}, immutable"
+
+
+def _accepts_gzip(request: Request) -> bool:
+    for item in request.headers.get("accept-encoding", "").split(","):
+        coding, _, params = item.partition(";")
+        if coding.strip().lower() == "gzip":
+            try:
+                return float(params.strip().removeprefix("q=") or 1) > 0  # gzip;q=0 表示不接受
+            except ValueError:
+                return True
+    return False
+
+
 @app.get("/api/letters")
-async def get_letters():
-    """获取26个字母列表"""
-    letters = [
-        {"id": 1, "letter": "A", "word": "Apple", "image": "🍎"},
-        {"id": 2, "letter": "B", "word": "Ball", "image": "⚽"},
-        {"id": 3, "letter": "C", "word": "Cat", "image": "🐱"},
-        {"id": 4, "letter": "D", "word": "Dog", "image": "🐶"},
-        {"id": 5, "letter": "E", "word": "Elephant", "image": "🐘"},
-        {"id": 6, "letter": "F", "word": "Fish", "image": "🐟"},
-        {"id": 7, "letter": "G", "word": "Grape", "image": "🍇"},
-        {"id": 8, "letter": "H", "word": "House", "image": "🏠"},
-        {"id": 9, "letter": "I", "word": "Ice cream", "image": "🍦"},
-        {"id": 10, "letter": "J", "word": "Juice", "image": "🧃"},
-        {"id": 11, "letter": "K", "word": "Kite", "image": "🪁"},
-        {"id": 12, "letter": "L", "word": "Lion", "image": "🦁"},
-        {"id": 13, "letter": "M", "word": "Moon", "image": "🌙"},
-        {"id": 14, "letter": "N", "word": "Nest", "image": "🪺"},
-        {"id": 15, "letter": "O", "word": "Orange", "image": "🍊"},
-        {"id": 16, "letter": "P", "word": "Panda", "image": "🐼"},
-        {"id": 17, "letter": "Q", "word": "Queen", "image": "👸"},
-        {"id": 18, "letter": "R", "word": "Rainbow", "image": "🌈"},
-        {"id": 19, "letter": "S", "word": "Sun", "image": "☀️"},
-        {"id": 20, "letter": "T", "word": "Tiger", "image": "🐯"},
-        {"id": 21, "letter": "U", "word": "Umbrella", "image": "☂️"},
-        {"id": 22, "letter": "V", "word": "Violin", "image": "🎻"},
-        {"id": 23, "letter": "W", "word": "Watermelon", "image": "🍉"},
-        {"id": 24, "letter": "X", "word": "Xylophone", "image": "🎵"},
-        {"id": 25, "letter": "Y", "word": "Yo-yo", "image": "🪀"},
-        {"id": 26, "letter": "Z", "word": "Zebra", "image": "🦓"},
-    ]
-    return letters
+async def get_letters(request: Request):
+    """获取26个字母列表（预先编码好的字节，支持 gzip）"""
+    if etag_matches(request, LETTERS_ETAG):
+        return not_modified_response(LETTERS_ETAG, LETTERS_CACHE_CONTROL)
+    headers = {"ETag": LETTERS_ETAG, "Cache-Control": LETTERS_CACHE_CONTROL, "Vary": "Accept-Encoding"}
+    if _accepts_gzip(request):
+        headers["Content-Encoding"] = "gzip"
+        return Response(LETTERS_JSON_GZIP, media_type="application/json", headers=headers)
+    return Response(LETTERS_JSON, media_type="application/json", headers=headers)
 
 
 if __name__ == "__main__":
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Boolean
+from sqlalchemy import Column, Integer, String, Date, DateTime, ForeignKey, Boolean, Index, UniqueConstraint
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.db.database import Base
@@ -21,10 +21,15 @@ class User(Base):
 
 class Progress(Base):
     __tablename__ = "progress"
+    __table_args__ = (
+        # 每个用户每个字母只有一条进度，更新时按此约束做 upsert；
+        # 唯一索引以 user_id 开头，也用于按用户查询全部进度
+        UniqueConstraint("user_id", "letter_id", name="uq_progress_user_letter"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"))
-    letter_id = Column(Integer, index=True)  # 1-26 对应 A-Z
+    letter_id = Column(Integer)  # 1-26 对应 A-Z
     stage = Column(Integer, default=0)  # 0:未开始, 1:认识, 2:发音, 3:练习完成
     score = Column(Integer, default=0)  # 0-3 星
     completed = Column(Boolean, default=False)
@@ -35,16 +40,34 @@ class Progress(Base):
 
 class Checkin(Base):
     __tablename__ = "checkins"
+    __table_args__ = (
+        # 每个用户每天只有一条打卡记录，打卡时按此约束做 upsert；
+        # 也用于按用户倒序取最近的打卡记录
+        UniqueConstraint("user_id", "date", name="uq_checkin_user_date"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"))
-    date = Column(String(10), index=True)  # YYYY-MM-DD
+    date = Column(Date, nullable=False)
     letters_learned = Column(Integer, default=0)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
     user = relationship("User", back_populates="checkins")
 
 
+class UserStats(Base):
+    """用户学习统计汇总，随进度更新和打卡在同一事务中维护"""
+
+    __tablename__ = "user_stats"
+
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    total_stars = Column(Integer, default=0, server_default="0", nullable=False)
+    completed_letters = Column(Integer, default=0, server_default="0", nullable=False)
+    current_streak = Column(Integer, default=0, server_default="0", nullable=False)  # 截至最后打卡日的连续天数
+    last_checkin_date = Column(Date, nullable=True)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+
 class Achievement(Base):
     __tablename__ = "achievements"
 
@@ -58,14 +81,43 @@ class Achievement(Base):
 
 class Recording(Base):
     __tablename__ = "recordings"
+    __table_args__ = (
+        # 保存录音时按用户和字母查找已有记录
+        Index("ix_recordings_user_letter", "user_id", "letter_id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"))
-    letter_id = Column(Integer, index=True)  # 1-26 对应 A-Z
+    letter_id = Column(Integer)  # 1-26 对应 A-Z
     letter = Column(String(1))  # 字母 A-Z
-    file_path = Column(String(500))  # 音频文件路径
+    file_path = Column(String(500))  # 存储键（audio_blobs.key）；旧录音为本地文件路径
     file_url = Column(String(500))  # 音频文件URL
     score = Column(Integer, default=0)  # 评分 0-3
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
     user = relationship("User", back_populates="recordings")
+
+
+class AudioBlob(Base):
+    """按内容寻址存储的录音文件及其引用计数（被多少条录音记录使用）"""
+
+    __tablename__ = "audio_blobs"
+
+    key = Column(String(100), primary_key=True)  # 存储键：ab/cd/<sha256>.<扩展名>
+    size = Column(Integer, nullable=False)
+    ref_count = Column(Integer, default=0, server_default="0", nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+class SyncReceipt(Base):
+    """批量同步已处理过的事件（按客户端幂等键去重）"""
+
+    __tablename__ = "sync_receipts"
+    __table_args__ = (
+        UniqueConstraint("user_id", "idempotency_key", name="uq_sync_receipt_user_key"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"))
+    idempotency_key = Column(String(64))
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -1,4 +1,5 @@
 from datetime import datetime, timedelta
+from typing import Optional, Tuple
 
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
@@ -11,22 +12,64 @@ from app.config import get_settings
 from app.db.database import get_db
 from app.models.models import User
 from app.schemas.schemas import Token, UserCreate, UserResponse
+from app.services.executor import BoundedExecutor, ExecutorBusyError, ExecutorTimeoutError
+from app.services.user_cache import CachedUser, get_user_cache, invalidate_user
 
 router = APIRouter(prefix="/auth", tags=["认证"])
 
 settings = get_settings()
-pwd_context = CryptContext(schemes=["bcrypt_sha256"], deprecated="auto")
+# 调整 rounds 后，旧哈希会在用户下次登录时按新强度重新计算
+pwd_context = CryptContext(
+    schemes=["bcrypt_sha256"],
+    deprecated="auto",
+    bcrypt_sha256__rounds=settings.password_hash_rounds,
+)
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/auth/login")
 
+# bcrypt 计算耗 CPU，放到独立线程池执行，登录高峰时不阻塞事件循环
+password_executor = BoundedExecutor(
+    "password",
+    max_workers=settings.password_hash_workers,
+    max_queue=settings.password_hash_queue_size,
+    timeout=settings.password_hash_timeout_seconds,
+)
+
 
 def verify_password(plain_password, hashed_password):
+    """同步校验密码（供脚本使用，接口中请用 verify_and_update_password）"""
     return pwd_context.verify(plain_password, hashed_password)
 
 
 def get_password_hash(password):
+    """同步计算密码哈希（供脚本使用，接口中请用 hash_password）"""
     return pwd_context.hash(password)
 
 
+async def _run_password_task(fn, *args):
+    try:
+        return await password_executor.run(fn, *args)
+    except (ExecutorBusyError, ExecutorTimeoutError) as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="登录人数较多，请稍后再试",
+            headers={"Retry-After": str(e.retry_after)},
+        )
+
+
+async def hash_password(password: str) -> str:
+    return await _run_password_task(pwd_context.hash, password)
+
+
+async def verify_and_update_password(password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """
+    校验密码
+
+    Returns:
+        (是否正确, 新哈希)；哈希强度与当前配置不一致时新哈希不为 None，调用方应保存
+    """
+    return await _run_password_task(pwd_context.verify_and_update, password, hashed_password)
+
+
 def create_access_token(data: dict):
     to_encode = data.copy()
     expire = datetime.utcnow() + timedelta(minutes=settings.access_token_expire_minutes)
@@ -34,25 +77,53 @@ def create_access_token(data: dict):
     return jwt.encode(to_encode, settings.secret_key, algorithm=settings.algorithm)
 
 
+async def get_user_from_token(token: str, db: AsyncSession) -> Optional[CachedUser]:
+    """
+    解析访问令牌得到当前用户，令牌无效或用户不存在时返回 None
+
+    令牌带有用户 ID（uid）时先查进程内缓存，命中则不访问数据库；
+    旧令牌没有 uid，仍按昵称查询。
+    """
+    try:
+        payload = jwt.decode(token, settings.secret_key, algorithms=[settings.algorithm])
+    except JWTError:
+        return None
+    nickname: str = payload.get("sub")
+    if nickname is None:
+        return None
+    user_id = payload.get("uid")
+
+    cache = get_user_cache()
+    if user_id is not None and cache is not None:
+        cached = cache.get(user_id)
+        if cached is not None and cached.nickname == nickname:
+            return cached
+
+    if user_id is not None:
+        result = await db.execute(select(User).where(User.id == user_id))
+    else:
+        result = await db.execute(select(User).where(User.nickname == nickname))
+    user = result.scalar_one_or_none()
+    # ID 对应的用户换了昵称（或 ID 被复用）时令牌不再有效
+    if user is None or user.nickname != nickname:
+        return None
+
+    current_user = CachedUser.from_orm_user(user)
+    if cache is not None:
+        cache.set(current_user)
+    return current_user
+
+
 async def get_current_user(
     token: str = Depends(oauth2_scheme),
     db: AsyncSession = Depends(get_db)
-):
+) -> CachedUser:
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="无效的认证凭证",
         headers={"WWW-Authenticate": "Bearer"},
     )
-    try:
-        payload = jwt.decode(token, settings.secret_key, algorithms=[settings.algorithm])
-        nickname: str = payload.get("sub")
-        if nickname is None:
-            raise credentials_exception
-    except JWTError:
-        raise credentials_exception
-
-    result = await db.execute(select(User).where(User.nickname == nickname))
-    user = result.scalar_one_or_none()
+    user = await get_user_from_token(token, db)
     if user is None:
         raise credentials_exception
     return user
@@ -66,7 +137,7 @@ async def register(user_data: UserCreate, db: AsyncSession = Depends(get_db)):
     if existing_user:
         raise HTTPException(status_code=400, detail="该昵称已被使用")
 
-    hashed_password = get_password_hash(user_data.password)
+    hashed_password = await hash_password(user_data.password)
     new_user = User(
         nickname=user_data.nickname,
         hashed_password=hashed_password
@@ -83,29 +154,31 @@ async def login(
     db: AsyncSession = Depends(get_db)
 ):
     """用户登录"""
-    print(f"Login attempt: username={form_data.username}, password={form_data.password}")
     result = await db.execute(select(User).where(User.nickname == form_data.username))
     user = result.scalar_one_or_none()
-    
+
+    is_password_valid, new_hash = False, None
     if user:
-        print(f"User found: {user.nickname}, checking password...")
-        is_password_valid = verify_password(form_data.password, user.hashed_password)
-        print(f"Password valid: {is_password_valid}")
-    else:
-        print(f"User not found: {form_data.username}")
+        is_password_valid, new_hash = await verify_and_update_password(form_data.password, user.hashed_password)
 
-    if not user or not verify_password(form_data.password, user.hashed_password):
+    if not is_password_valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="昵称或密码错误",
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-    access_token = create_access_token(data={"sub": user.nickname})
+    # 哈希强度配置变更后，借这次登录透明地升级旧哈希
+    if new_hash:
+        user.hashed_password = new_hash
+        await db.commit()
+        invalidate_user(user.id)
+
+    access_token = create_access_token(data={"sub": user.nickname, "uid": user.id})
     return {"access_token": access_token, "token_type": "bearer"}
 
 
 @router.get("/me", response_model=UserResponse)
-async def get_me(current_user: User = Depends(get_current_user)):
+async def get_me(current_user: CachedUser = Depends(get_current_user)):
     """获取当前用户信息"""
     return current_user
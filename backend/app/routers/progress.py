@@ -1,27 +1,35 @@
-from datetime import date, timedelta
+from collections import Counter
+from datetime import date
 from typing import List
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
 from sqlalchemy import desc, func, select
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.db.database import get_db
-from app.models.models import Checkin, Progress, User
+from app.db.database import get_db, get_read_db
+from app.models.models import Checkin, Progress, SyncReceipt, UserStats
 from app.routers.auth import get_current_user
-from app.schemas.schemas import CheckinResponse, ProgressResponse, ProgressUpdate
+from app.schemas.schemas import (
+    CheckinResponse,
+    ProgressDelta,
+    ProgressResponse,
+    ProgressSyncRequest,
+    ProgressSyncResponse,
+    ProgressUpdate,
+)
+from app.services.user_cache import CachedUser
+from app.services.user_stats import lock_user_stats, rebuild_user_stats, record_checkin, refresh_progress_stats
+from app.services.user_versions import bump_user_version, check_not_modified
 
 router = APIRouter(prefix="/progress", tags=["学习进度"])
 
+# 单次同步最多接受的事件数
+MAX_SYNC_EVENTS = 500
 
-@router.get("/", response_model=List[ProgressResponse])
-async def get_all_progress(
-    current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
-):
-    """获取用户所有字母的学习进度"""
-    result = await db.execute(select(Progress).where(Progress.user_id == current_user.id))
-    progress_list = result.scalars().all()
 
+def _all_letters(progress_list) -> List[ProgressResponse]:
+    """补齐没有记录的字母，按 A-Z 返回26条进度"""
     progress_dict = {p.letter_id: p for p in progress_list}
     response: List[ProgressResponse] = []
     for i in range(1, 27):
@@ -37,84 +45,202 @@ async def get_all_progress(
     return response
 
 
+def _progress_upsert(user_id: int, deltas):
+    """
+    插入进度，已有记录时按较大值合并
+
+    一条语句完成，并发更新同一字母也不会产生重复行。
+    同一条语句不能两次更新同一行，deltas 中每个字母最多出现一次。
+    """
+    stmt = insert(Progress).values([
+        {
+            "user_id": user_id,
+            "letter_id": d.letter_id,
+            "stage": d.stage,
+            "score": d.score,
+            "completed": d.stage >= 3,
+        }
+        for d in deltas
+    ])
+    merged_stage = func.greatest(Progress.stage, stmt.excluded.stage)
+    return stmt.on_conflict_do_update(
+        index_elements=[Progress.user_id, Progress.letter_id],
+        set_={
+            "score": func.greatest(Progress.score, stmt.excluded.score),
+            "stage": merged_stage,
+            "completed": merged_stage >= 3,
+            "updated_at": func.now(),
+        },
+    )
+
+
+def _checkin_upsert(user_id: int, counts):
+    """
+    插入打卡记录，当天已有记录时累加学习字母数
+
+    并发打卡不会丢失计数，也不会产生同一天的重复行。counts 为 (日期, 次数)，每个日期最多出现一次。
+    """
+    stmt = insert(Checkin).values([
+        {"user_id": user_id, "date": day, "letters_learned": count}
+        for day, count in counts
+    ])
+    return stmt.on_conflict_do_update(
+        index_elements=[Checkin.user_id, Checkin.date],
+        set_={"letters_learned": Checkin.letters_learned + stmt.excluded.letters_learned},
+    )
+
+
+@router.get("/", response_model=List[ProgressResponse])
+async def get_all_progress(
+    request: Request,
+    response: Response,
+    current_user: CachedUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """获取用户所有字母的学习进度"""
+    cached = check_not_modified(request, response, current_user.id, "progress")
+    if cached is not None:
+        return cached
+    result = await db.execute(select(Progress).where(Progress.user_id == current_user.id))
+    return _all_letters(result.scalars().all())
+
+
 @router.post("/update", response_model=ProgressResponse)
 async def update_progress(
     progress_data: ProgressUpdate,
-    current_user: User = Depends(get_current_user),
+    current_user: CachedUser = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
     """更新字母学习进度"""
     if progress_data.letter_id < 1 or progress_data.letter_id > 26:
         raise HTTPException(status_code=400, detail="无效的字母ID")
 
-    result = await db.execute(
-        select(Progress).where(
-            Progress.user_id == current_user.id,
-            Progress.letter_id == progress_data.letter_id
-        )
+    await lock_user_stats(db, current_user.id)
+    stmt = _progress_upsert(current_user.id, [progress_data]).returning(
+        Progress.letter_id, Progress.stage, Progress.score, Progress.completed
     )
-    progress = result.scalar_one_or_none()
-
-    if progress:
-        if progress_data.score > progress.score:
-            progress.score = progress_data.score
-        if progress_data.stage > progress.stage:
-            progress.stage = progress_data.stage
-        progress.completed = progress.stage >= 3
-    else:
-        progress = Progress(
-            user_id=current_user.id,
-            letter_id=progress_data.letter_id,
-            stage=progress_data.stage,
-            score=progress_data.score,
-            completed=progress_data.stage >= 3
+    result = await db.execute(stmt)
+    row = result.one()
+    await refresh_progress_stats(db, current_user.id)
+    await db.commit()
+    bump_user_version(current_user.id)
+    return ProgressResponse(
+        letter_id=row.letter_id,
+        stage=row.stage,
+        score=row.score,
+        completed=row.completed
+    )
+
+
+@router.post("/sync", response_model=ProgressSyncResponse)
+async def sync_progress(
+    sync_data: ProgressSyncRequest,
+    current_user: CachedUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    批量同步离线期间的进度与打卡
+
+    客户端断网期间积累的事件一次提交，在同一个事务中处理：
+    - 带幂等键的事件只生效一次，重传安全
+    - 进度按字母合并为较大值（与顺序无关），一条 upsert 写入
+    - 打卡按 client_ts 的本地日期计入当天
+    返回合并后全部26个字母的进度
+    """
+    events = len(sync_data.progress) + len(sync_data.checkins)
+    if events > MAX_SYNC_EVENTS:
+        raise HTTPException(status_code=400, detail=f"单次同步事件不能超过{MAX_SYNC_EVENTS}条")
+    if any(d.letter_id < 1 or d.letter_id > 26 for d in sync_data.progress):
+        raise HTTPException(status_code=400, detail="无效的字母ID")
+
+    await lock_user_stats(db, current_user.id)
+
+    # 1. 登记幂等键，只有首次出现的键返回
+    keys = [e.idempotency_key for e in [*sync_data.progress, *sync_data.checkins] if e.idempotency_key]
+    accepted = set()
+    if keys:
+        result = await db.execute(
+            insert(SyncReceipt)
+            .values([{"user_id": current_user.id, "idempotency_key": k} for k in set(keys)])
+            .on_conflict_do_nothing(index_elements=[SyncReceipt.user_id, SyncReceipt.idempotency_key])
+            .returning(SyncReceipt.idempotency_key)
         )
-        db.add(progress)
+        accepted = set(result.scalars().all())
+
+    def is_new(event) -> bool:
+        if event.idempotency_key is None:
+            return True
+        if event.idempotency_key in accepted:
+            accepted.discard(event.idempotency_key)  # 同一批次内重复的键也只算一次
+            return True
+        return False
+
+    deltas = [d for d in sync_data.progress if is_new(d)]
+    checkin_events = [c for c in sync_data.checkins if is_new(c)]
+
+    # 2. 进度：先在内存里按字母合并，再一次写入
+    merged = {}
+    for d in deltas:
+        current = merged.get(d.letter_id)
+        if current is None:
+            merged[d.letter_id] = ProgressDelta(letter_id=d.letter_id, stage=d.stage, score=d.score)
+        else:
+            current.stage = max(current.stage, d.stage)
+            current.score = max(current.score, d.score)
+    if merged:
+        await db.execute(_progress_upsert(current_user.id, merged.values()))
+
+    # 3. 打卡：按日期计数，一条 upsert 累加到当天记录
+    per_day = Counter(c.client_ts.date() for c in checkin_events)
+    if per_day:
+        await db.execute(_checkin_upsert(current_user.id, per_day.items()))
 
+    # 补交的打卡可能早于最后打卡日，连续天数整体重新计算
+    if merged or per_day:
+        await db.flush()
+        await rebuild_user_stats(db, current_user.id)
+
+    result = await db.execute(select(Progress).where(Progress.user_id == current_user.id))
+    progress = _all_letters(result.scalars().all())
     await db.commit()
-    await db.refresh(progress)
-    return progress
+    if merged or per_day:
+        bump_user_version(current_user.id)
+
+    applied = len(deltas) + len(checkin_events)
+    return ProgressSyncResponse(progress=progress, applied=applied, duplicates=events - applied)
 
 
 @router.post("/checkin", response_model=CheckinResponse)
 async def checkin(
-    current_user: User = Depends(get_current_user),
+    current_user: CachedUser = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
     """每日打卡"""
-    today = date.today().isoformat()
+    today = date.today()
 
+    await lock_user_stats(db, current_user.id)
     result = await db.execute(
-        select(Checkin).where(
-            Checkin.user_id == current_user.id,
-            Checkin.date == today
-        )
-    )
-    existing = result.scalar_one_or_none()
-
-    if existing:
-        existing.letters_learned += 1
-        await db.commit()
-        await db.refresh(existing)
-        return existing
-
-    record = Checkin(
-        user_id=current_user.id,
-        date=today,
-        letters_learned=1
+        _checkin_upsert(current_user.id, [(today, 1)])
+        .returning(Checkin.date, Checkin.letters_learned)
     )
-    db.add(record)
+    record = result.one()
+    await record_checkin(db, current_user.id, today)
     await db.commit()
-    await db.refresh(record)
-    return record
+    bump_user_version(current_user.id)
+    return CheckinResponse(date=record.date, letters_learned=record.letters_learned)
 
 
 @router.get("/checkins", response_model=List[CheckinResponse])
 async def get_checkins(
-    current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    request: Request,
+    response: Response,
+    current_user: CachedUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db)
 ):
     """获取打卡记录"""
+    cached = check_not_modified(request, response, current_user.id, "checkins")
+    if cached is not None:
+        return cached
     result = await db.execute(
         select(Checkin)
         .where(Checkin.user_id == current_user.id)
@@ -126,44 +252,26 @@ async def get_checkins(
 
 @router.get("/stats")
 async def get_stats(
-    current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    request: Request,
+    response: Response,
+    current_user: CachedUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db)
 ):
     """获取学习统计"""
-    stars_result = await db.execute(
-        select(func.coalesce(func.sum(Progress.score), 0)).where(
-            Progress.user_id == current_user.id
-        )
-    )
-    stars = stars_result.scalar_one()
-
-    completed_result = await db.execute(
-        select(func.count()).select_from(Progress).where(
-            Progress.user_id == current_user.id,
-            Progress.completed.is_(True)
-        )
-    )
-    completed = completed_result.scalar_one()
-
-    checkins_result = await db.execute(
-        select(Checkin)
-        .where(Checkin.user_id == current_user.id)
-        .order_by(desc(Checkin.date))
-    )
-    checkins = checkins_result.scalars().all()
-
-    streak = 0
+    # 连续天数与当天日期有关，跨天后即使没有写入也要重新计算
     today = date.today()
-    for i, c in enumerate(checkins):
-        check_date = date.fromisoformat(c.date)
-        expected_date = today - timedelta(days=i)
-        if check_date == expected_date:
-            streak += 1
-        else:
-            break
+    cached = check_not_modified(request, response, current_user.id, "stats", today.isoformat())
+    if cached is not None:
+        return cached
+
+    stats = await db.get(UserStats, current_user.id)
+    if stats is None:
+        return {"total_stars": 0, "completed_letters": 0, "streak_days": 0}
 
+    # 今天还没打卡时连续天数显示为0（与按打卡记录逐日计算的结果一致）
+    streak = stats.current_streak if stats.last_checkin_date == today else 0
     return {
-        "total_stars": int(stars),
-        "completed_letters": int(completed),
+        "total_stars": stats.total_stars,
+        "completed_letters": stats.completed_letters,
         "streak_days": streak
     }
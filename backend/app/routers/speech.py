@@ -1,30 +1,223 @@
-import os
+import asyncio
+import hashlib
+import io
+import json
+import re
+import uuid
+from email.utils import formatdate, parsedate_to_datetime
 from pathlib import Path
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form
+from stat import S_ISREG
+from typing import BinaryIO, Dict, Optional, Tuple
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Request, Response, UploadFile, File, Form, Query, WebSocket, WebSocketDisconnect, status
+from fastapi.responses import FileResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 
-from app.db.database import get_db
-from app.models.models import User, Recording
-from app.schemas.schemas import SpeechEvalResponse, RecordingResponse
-from app.routers.auth import get_current_user
+from app.db.database import AsyncSessionLocal, get_db
+from app.models.models import Recording
+from app.schemas.schemas import SpeechEvalAndSaveResponse, SpeechEvalResponse, RecordingResponse
+from app.routers.auth import get_current_user, get_user_from_token
 from app.config import get_settings
-from app.services.whisper_speech import evaluate_speech as evaluate_speech_service
+from app.services.audio_blobs import acquire_blob, discard_file, release_file
+from app.services.audio_decode import SAMPLE_RATE, AudioDecodeError
+from app.services.audio_store import blob_key, blob_key_from_filename, get_audio_store
+from app.services.executor import ExecutorBusyError, ExecutorTimeoutError
+from app.services.speech_evaluator import SpeechBackendError, SpeechRequestError
+from app.services.speech_router import evaluate_speech as evaluate_speech_service
+from app.services.speech_stream import SpeechStream
+from app.services.transcode_queue import submit_transcode
+from app.services.user_cache import CachedUser
+from app.services.user_versions import etag_matches
+from app.services.whisper_speech import get_speech_evaluator as get_whisper_evaluator
 
 router = APIRouter(prefix="/speech", tags=["语音评分"])
 
 settings = get_settings()
 
-# 确保上传目录存在
-UPLOAD_DIR = Path("uploads/audio")
+# 上传中的临时文件写在存储目录下（本地存储时与最终位置同一文件系统，可以原子改名）
+UPLOAD_DIR = Path(settings.audio_store_dir)
 UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
+# 旧录音（按内容寻址之前保存的平铺文件）所在目录
+LEGACY_AUDIO_DIR = Path(settings.audio_legacy_dir)
+
+# 可下载的录音文件名（不含路径，不以 . 开头）与可保存的扩展名
+AUDIO_FILENAME_RE = re.compile(r"[A-Za-z0-9][A-Za-z0-9_.-]*")
+AUDIO_EXT_RE = re.compile(r"[a-z0-9]{1,8}")
+AUDIO_MEDIA_TYPES = {
+    'webm': 'audio/webm',
+    'mp3': 'audio/mpeg',
+    'mp4': 'audio/mp4',
+    'wav': 'audio/wav',
+    'ogg': 'audio/ogg'
+}
+# 录音文件名唯一且写入后不变，浏览器可一直缓存；录音属于个人数据，不进共享缓存
+AUDIO_CACHE_CONTROL = f"private, max-age={settings.audio_cache_max_age}, immutable"
+
+# 上传音频大小上限
+MAX_AUDIO_BYTES = 5 * 1024 * 1024
+# 录音写盘的分块大小
+UPLOAD_CHUNK_SIZE = 64 * 1024
+
+
+class AudioTooLargeError(Exception):
+    """写盘过程中发现录音超过大小上限"""
+
+
+def _parse_letter(letter: str) -> str:
+    """校验目标字母，返回大写形式"""
+    if len(letter) != 1 or not letter.isalpha():
+        raise HTTPException(status_code=400, detail="请提供单个字母")
+    return letter.upper()
+
+
+async def _evaluate(audio_content: bytes, letter: str) -> Dict:
+    """使用语音评分服务（按配置调度 Whisper / 阿里云），错误转换为 HTTP 响应"""
+    try:
+        return await evaluate_speech_service(audio_content, letter)
+    except AudioDecodeError:
+        raise HTTPException(status_code=400, detail="无法解析音频文件")
+    except SpeechRequestError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except SpeechBackendError as e:
+        # 所有后端都失败（远程接口出错、响应无法解析等）
+        print(f"语音评分失败: {e}")
+        raise HTTPException(status_code=503, detail="语音评分服务暂时不可用，请稍后再试")
+    except ExecutorBusyError as e:
+        raise HTTPException(
+            status_code=503,
+            detail="语音评分服务繁忙，请稍后再试",
+            headers={"Retry-After": str(e.retry_after)},
+        )
+    except ExecutorTimeoutError as e:
+        raise HTTPException(
+            status_code=503,
+            detail="语音评分超时，请稍后再试",
+            headers={"Retry-After": str(e.retry_after)},
+        )
+
+
+def _audio_ext(upload_filename: Optional[str]) -> str:
+    """按上传文件名取扩展名，无法识别时按 webm 处理"""
+    ext = upload_filename.rsplit('.', 1)[-1].lower() if upload_filename and '.' in upload_filename else ''
+    return ext if AUDIO_EXT_RE.fullmatch(ext) else 'webm'
+
+
+def _temp_upload_path() -> Path:
+    return UPLOAD_DIR / f".upload-{uuid.uuid4().hex}.tmp"
+
+
+def _write_stream(src: BinaryIO, tmp_path: Path, max_bytes: int = MAX_AUDIO_BYTES) -> Tuple[str, int]:
+    """
+    分块写入临时文件，同时计算内容的 SHA-256，返回 (哈希, 字节数)
+
+    超过 max_bytes 时立即中止并抛出 AudioTooLargeError；失败时不会留下写了一半的文件。
+    在线程中调用，不阻塞事件循环。
+    """
+    digest = hashlib.sha256()
+    written = 0
+    try:
+        with open(tmp_path, "wb") as f:
+            while chunk := src.read(UPLOAD_CHUNK_SIZE):
+                written += len(chunk)
+                if written > max_bytes:
+                    raise AudioTooLargeError()
+                digest.update(chunk)
+                f.write(chunk)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+    return digest.hexdigest(), written
+
+
+async def _save_recording_row(
+    db: AsyncSession,
+    background_tasks: BackgroundTasks,
+    user_id: int,
+    letter: str,
+    tmp_path: Path,
+    digest: str,
+    size: int,
+    ext: str,
+    score: int,
+) -> Recording:
+    """
+    把写好的临时文件存入录音存储，并更新或创建该用户该字母的录音记录
+
+    内容相同的录音只存一份；提交成功后不再被引用的旧文件交给后台任务回收，
+    提交失败时旧文件保持不变。临时文件最终总会被移走或删除。
+    """
+    letter_id = ord(letter) - ord('A') + 1
+    key = blob_key(digest, ext)
+
+    # 生成文件URL（相对路径，前端需要配置正确的baseURL）
+    file_url = f"/api/speech/audio/{digest}.{ext}"
+
+    try:
+        await acquire_blob(db, get_audio_store(), key, size, tmp_path)
+
+        # 检查是否已存在该用户和字母的录音记录
+        result = await db.execute(
+            select(Recording).where(
+                Recording.user_id == user_id,
+                Recording.letter_id == letter_id
+            )
+        )
+        existing_recording = result.scalar_one_or_none()
+
+        # 更新或创建录音记录
+        old_file_path = None
+        if existing_recording:
+            # 更新现有记录
+            old_file_path = existing_recording.file_path
+            existing_recording.letter = letter
+            existing_recording.file_path = key
+            existing_recording.file_url = file_url
+            existing_recording.score = score
+            recording = existing_recording
+        else:
+            # 创建新记录
+            recording = Recording(
+                user_id=user_id,
+                letter_id=letter_id,
+                letter=letter,
+                file_path=key,
+                file_url=file_url,
+                score=score
+            )
+            db.add(recording)
+
+        # 释放旧文件的引用（重录了完全相同的内容时，抵消上面多加的一次）
+        unreferenced = await release_file(db, old_file_path)
+
+        await db.commit()
+    finally:
+        await asyncio.to_thread(tmp_path.unlink, missing_ok=True)
+
+    if unreferenced is not None:
+        background_tasks.add_task(discard_file, unreferenced)
+
+    await db.refresh(recording)
+    # 排队转码为单声道 Opus，完成后替换 file_path / file_url
+    submit_transcode(recording.id)
+    return recording
+
+
+def _recording_response(recording: Recording) -> RecordingResponse:
+    return RecordingResponse(
+        id=recording.id,
+        letter_id=recording.letter_id,
+        letter=recording.letter,
+        file_url=recording.file_url,
+        score=recording.score,
+        created_at=recording.created_at
+    )
 
 
 @router.post("/evaluate", response_model=SpeechEvalResponse)
 async def evaluate_speech(
     letter: str = Form(...),
     audio: UploadFile = File(...),
-    current_user: User = Depends(get_current_user),
+    current_user: CachedUser = Depends(get_current_user),
     _db: AsyncSession = Depends(get_db)
 ):
     """
@@ -39,22 +232,16 @@ async def evaluate_speech(
     - accuracy: 准确度百分比
     - feedback: 反馈文字
     """
-    # 验证字母
-    if len(letter) != 1 or not letter.isalpha():
-        raise HTTPException(status_code=400, detail="请提供单个字母")
-
-    letter = letter.upper()
+    letter = _parse_letter(letter)
 
     # 读取音频数据
     audio_content = await audio.read()
 
     # 验证音频大小 (最大5MB)
-    if len(audio_content) > 5 * 1024 * 1024:
+    if len(audio_content) > MAX_AUDIO_BYTES:
         raise HTTPException(status_code=400, detail="音频文件过大")
 
-    # 使用语音评分服务（Whisper）
-    result = await evaluate_speech_service(audio_content, letter)
-
+    result = await _evaluate(audio_content, letter)
     return SpeechEvalResponse(
         score=result["score"],
         accuracy=result["accuracy"],
@@ -62,12 +249,191 @@ async def evaluate_speech(
     )
 
 
+@router.post("/evaluate-and-save", response_model=SpeechEvalAndSaveResponse)
+async def evaluate_and_save(
+    background_tasks: BackgroundTasks,
+    letter: str = Form(...),
+    audio: UploadFile = File(...),
+    current_user: CachedUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    评估发音并保存录音（一次上传完成 /evaluate + /save）
+
+    录音文件写盘与评分同时进行，录音记录的评分即本次评分。
+    评分失败时不保存；文件保存失败时仍返回评分，recording 为空。
+
+    参数:
+    - letter: 目标字母 (A-Z)
+    - audio: 音频文件
+
+    返回:
+    - score / accuracy / feedback: 同 /evaluate
+    - recording: 录音记录信息
+    """
+    letter = _parse_letter(letter)
+
+    # 评分需要完整的音频数据，最多读到上限多一个字节
+    audio_content = await audio.read(MAX_AUDIO_BYTES + 1)
+    if len(audio_content) > MAX_AUDIO_BYTES:
+        raise HTTPException(status_code=400, detail="音频文件过大")
+
+    tmp_path = _temp_upload_path()
+    write_task = asyncio.create_task(asyncio.to_thread(_write_stream, io.BytesIO(audio_content), tmp_path))
+
+    try:
+        result = await _evaluate(audio_content, letter)
+    except BaseException:
+        # 评分失败不保留录音
+        await asyncio.gather(write_task, return_exceptions=True)
+        await asyncio.to_thread(tmp_path.unlink, missing_ok=True)
+        raise
+
+    recording = None
+    try:
+        digest, size = await write_task
+    except OSError as e:
+        print(f"保存录音文件失败: {e}")
+    else:
+        recording = await _save_recording_row(
+            db, background_tasks, current_user.id, letter, tmp_path, digest, size,
+            _audio_ext(audio.filename), result["score"],
+        )
+
+    return SpeechEvalAndSaveResponse(
+        score=result["score"],
+        accuracy=result["accuracy"],
+        feedback=result["feedback"],
+        recording=_recording_response(recording) if recording else None,
+    )
+
+
+async def _send_stream_error(websocket: WebSocket, detail: str, code: int, retry_after: int = None):
+    message = {"type": "error", "detail": detail}
+    if retry_after is not None:
+        message["retry_after"] = retry_after
+    try:
+        await websocket.send_json(message)
+        await websocket.close(code=code)
+    except (WebSocketDisconnect, RuntimeError):
+        pass  # 客户端已断开
+
+
+def _stream_message(text: str) -> Dict:
+    """解析流式接口的文本消息，必须是 JSON 对象（否则抛出 ValueError，按请求格式错误处理）"""
+    message = json.loads(text)
+    if not isinstance(message, dict):
+        raise ValueError("消息必须是 JSON 对象")
+    return message
+
+
+def _stream_sample_rate(value) -> int:
+    """解析配置中的采样率，只接受整数（或整数字符串），否则抛出 ValueError"""
+    if not isinstance(value, bool) and isinstance(value, (int, str)):
+        try:
+            return int(value)
+        except ValueError:
+            pass
+    raise ValueError("采样率必须是整数")
+
+
+@router.websocket("/stream")
+async def stream_speech(websocket: WebSocket, token: str = Query(...)):
+    """
+    流式评估用户语音发音
+
+    连接 /api/speech/stream?token=<访问令牌>（浏览器的 WebSocket 无法携带 Authorization 头）
+    1. 客户端先发送 JSON：{"letter": "A", "format": "pcm_s16le", "sample_rate": 16000}
+       format 可选 pcm_s16le（16 位单声道 PCM）或 webm / ogg / mp4（MediaRecorder 分片）
+    2. 之后以二进制消息发送音频分块；松开录音按钮时发送 {"type": "end"}
+    3. 服务端推送中间结果 {"type": "partial", score, accuracy, feedback}，
+       检测到说完（或收到 end）后推送 {"type": "final", score, accuracy, feedback} 并关闭连接
+    出错时推送 {"type": "error", "detail": ...} 后关闭连接
+    """
+    # 只在鉴权时短暂占用数据库连接，不在整个会话期间持有
+    async with AsyncSessionLocal() as db:
+        current_user = await get_user_from_token(token, db)
+    if current_user is None:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+
+    await websocket.accept()
+
+    async def send_partial(result: dict):
+        await websocket.send_json({
+            "type": "partial",
+            "score": result["score"],
+            "accuracy": result["accuracy"],
+            "feedback": result["feedback"],
+        })
+
+    stream = None
+    try:
+        config = _stream_message(await websocket.receive_text())
+        letter = str(config.get("letter", "")).upper()
+        if len(letter) != 1 or not letter.isalpha():
+            await _send_stream_error(websocket, "请提供单个字母", status.WS_1003_UNSUPPORTED_DATA)
+            return
+
+        stream = SpeechStream(
+            get_whisper_evaluator(),
+            letter,
+            audio_format=config.get("format", "pcm_s16le"),
+            sample_rate=_stream_sample_rate(config.get("sample_rate", SAMPLE_RATE)),
+            on_partial=send_partial,
+        )
+
+        while not stream.speech_ended:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                return
+            if message.get("bytes"):
+                # 与上传接口一致，最大5MB
+                if stream.bytes_received + len(message["bytes"]) > 5 * 1024 * 1024:
+                    await _send_stream_error(websocket, "音频文件过大", status.WS_1009_MESSAGE_TOO_BIG)
+                    return
+                await stream.feed(message["bytes"])
+            elif message.get("text") and _stream_message(message["text"]).get("type") == "end":
+                break
+
+        result = await stream.finish()
+        await websocket.send_json({
+            "type": "final",
+            "score": result["score"],
+            "accuracy": result["accuracy"],
+            "feedback": result["feedback"],
+        })
+        await websocket.close()
+    except WebSocketDisconnect:
+        pass
+    except AudioDecodeError:
+        await _send_stream_error(websocket, "无法解析音频数据", status.WS_1003_UNSUPPORTED_DATA)
+    except ExecutorBusyError as e:
+        await _send_stream_error(websocket, "语音评分服务繁忙，请稍后再试", status.WS_1013_TRY_AGAIN_LATER, e.retry_after)
+    except ExecutorTimeoutError as e:
+        await _send_stream_error(websocket, "语音评分超时，请稍后再试", status.WS_1013_TRY_AGAIN_LATER, e.retry_after)
+    except ValueError as e:
+        # 消息不是合法 JSON 对象、采样率不是数字等
+        await _send_stream_error(websocket, f"请求格式错误: {e}", status.WS_1003_UNSUPPORTED_DATA)
+    except SpeechBackendError as e:
+        # 与 /evaluate 一致：模型或远程接口出错
+        print(f"流式语音评分失败: {e}")
+        await _send_stream_error(websocket, "语音评分服务暂时不可用，请稍后再试", status.WS_1011_INTERNAL_ERROR)
+    except Exception as e:
+        print(f"流式语音评分失败: {e!r}")
+        await _send_stream_error(websocket, "语音评分失败，请稍后再试", status.WS_1011_INTERNAL_ERROR)
+    finally:
+        if stream is not None:
+            stream.close()
+
+
 @router.post("/save", response_model=RecordingResponse)
 async def save_recording(
+    background_tasks: BackgroundTasks,
     letter: str = Form(...),
     audio: UploadFile = File(...),
     score: int = Form(0),
-    current_user: User = Depends(get_current_user),
+    current_user: CachedUser = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
     """
@@ -81,118 +447,94 @@ async def save_recording(
     返回:
     - 录音记录信息
     """
-    # 验证字母
-    if len(letter) != 1 or not letter.isalpha():
-        raise HTTPException(status_code=400, detail="请提供单个字母")
-
-    letter = letter.upper()
+    letter = _parse_letter(letter)
 
     # 验证评分
     if score < 0 or score > 3:
         raise HTTPException(status_code=400, detail="评分必须在0-3之间")
 
-    # 读取音频数据
-    audio_content = await audio.read()
-
-    # 验证音频大小 (最大5MB)
-    if len(audio_content) > 5 * 1024 * 1024:
-        raise HTTPException(status_code=400, detail="音频文件过大")
-
-    # 获取字母ID
-    letter_id = ord(letter) - ord('A') + 1
-
-    # 检查是否已存在该用户和字母的录音记录
-    result = await db.execute(
-        select(Recording).where(
-            Recording.user_id == current_user.id,
-            Recording.letter_id == letter_id
-        )
-    )
-    existing_recording = result.scalar_one_or_none()
-
-    # 生成文件名：用户ID_字母_时间戳.扩展名
-    file_ext = audio.filename.split('.')[-1] if '.' in audio.filename else 'webm'
-    from datetime import datetime
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
-    filename = f"{current_user.id}_{letter}_{timestamp}.{file_ext}"
-    file_path = UPLOAD_DIR / filename
-
-    # 保存新文件（先保存，成功后再删除旧文件，避免新文件保存失败时丢失旧文件）
+    # 分块写入临时文件，同时检查大小 (最大5MB)
+    # 存好新文件、提交成功后才回收旧文件，避免新文件保存失败时丢失旧文件
+    tmp_path = _temp_upload_path()
     try:
-        with open(file_path, "wb") as f:
-            f.write(audio_content)
+        digest, size = await asyncio.to_thread(_write_stream, audio.file, tmp_path)
+    except AudioTooLargeError:
+        raise HTTPException(status_code=400, detail="音频文件过大")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"保存文件失败: {str(e)}")
 
-    # 新文件保存成功后，删除旧文件
-    if existing_recording:
-        old_file_path = Path(existing_recording.file_path)
-        if old_file_path.exists() and old_file_path != file_path:  # 确保不是同一个文件
-            try:
-                old_file_path.unlink()
-            except Exception:
-                pass  # 忽略删除旧文件时的错误
-
-    # 生成文件URL（相对路径，前端需要配置正确的baseURL）
-    file_url = f"/api/speech/audio/{filename}"
-
-    # 更新或创建录音记录
-    if existing_recording:
-        # 更新现有记录
-        existing_recording.letter = letter
-        existing_recording.file_path = str(file_path)
-        existing_recording.file_url = file_url
-        existing_recording.score = score
-        recording = existing_recording
-    else:
-        # 创建新记录
-        recording = Recording(
-            user_id=current_user.id,
-            letter_id=letter_id,
-            letter=letter,
-            file_path=str(file_path),
-            file_url=file_url,
-            score=score
-        )
-        db.add(recording)
+    recording = await _save_recording_row(
+        db, background_tasks, current_user.id, letter, tmp_path, digest, size, _audio_ext(audio.filename), score
+    )
+    return _recording_response(recording)
 
-    await db.commit()
-    await db.refresh(recording)
 
-    return RecordingResponse(
-        id=recording.id,
-        letter_id=recording.letter_id,
-        letter=recording.letter,
-        file_url=recording.file_url,
-        score=recording.score,
-        created_at=recording.created_at
-    )
+def _audio_not_modified(request: Request, etag: str, mtime: float) -> bool:
+    """客户端缓存的录音是否仍然有效（有 If-None-Match 时忽略 If-Modified-Since）"""
+    if request.headers.get("if-none-match") is not None:
+        return etag_matches(request, etag)
+    since = request.headers.get("if-modified-since")
+    if since:
+        try:
+            return int(mtime) <= parsedate_to_datetime(since).timestamp()
+        except (TypeError, ValueError):
+            return False
+    return False
 
 
 @router.get("/audio/{filename}")
-async def get_audio_file(filename: str):
+async def get_audio_file(filename: str, request: Request):
     """
     获取音频文件
+
+    文件名是内容哈希（旧录音带时间戳），内容写入后不再变化：返回强 ETag 和长期缓存头，
+    支持 If-None-Match（304）和 Range（206，iOS Safari 播放需要）。
+    本地存储配置了 AUDIO_ACCEL_REDIRECT_PREFIX 时由 nginx 按 X-Accel-Redirect 直接发送文件。
     """
-    file_path = UPLOAD_DIR / filename
-    if not file_path.exists():
+    # 只接受普通文件名（不允许路径分隔符、..、写入中的临时文件）
+    if not AUDIO_FILENAME_RE.fullmatch(filename):
         raise HTTPException(status_code=404, detail="文件不存在")
 
     # 根据文件扩展名确定媒体类型
     ext = filename.split('.')[-1].lower()
-    media_types = {
-        'webm': 'audio/webm',
-        'mp3': 'audio/mpeg',
-        'mp4': 'audio/mp4',
-        'wav': 'audio/wav',
-        'ogg': 'audio/ogg'
+    media_type = AUDIO_MEDIA_TYPES.get(ext, 'audio/webm')
+
+    # 按内容寻址的录音：文件名就是内容哈希，直接作为强 ETag
+    key = blob_key_from_filename(filename)
+    if key is not None:
+        etag = f'"{filename.split(".")[0]}"'
+        headers = {"ETag": etag, "Cache-Control": AUDIO_CACHE_CONTROL}
+        if etag_matches(request, etag):
+            return Response(status_code=304, headers=headers)
+        return await get_audio_store().serve(key, request, media_type, headers)
+
+    # 旧录音：平铺文件
+    file_path = LEGACY_AUDIO_DIR / filename
+    try:
+        stat_result = file_path.stat()
+    except OSError:
+        raise HTTPException(status_code=404, detail="文件不存在")
+    if not S_ISREG(stat_result.st_mode):
+        raise HTTPException(status_code=404, detail="文件不存在")
+
+    etag = f'"{stat_result.st_mtime_ns:x}-{stat_result.st_size:x}"'
+    headers = {
+        "ETag": etag,
+        "Last-Modified": formatdate(stat_result.st_mtime, usegmt=True),
+        "Cache-Control": AUDIO_CACHE_CONTROL,
     }
-    media_type = media_types.get(ext, 'audio/webm')
+    if _audio_not_modified(request, etag, stat_result.st_mtime):
+        return Response(status_code=304, headers=headers)
+
+    if settings.audio_accel_redirect_prefix:
+        headers["X-Accel-Redirect"] = settings.audio_accel_redirect_prefix.rstrip("/") + "/" + filename
+        return Response(media_type=media_type, headers=headers)
 
-    from fastapi.responses import FileResponse
     return FileResponse(
         path=str(file_path),
-        media_type=media_type
+        media_type=media_type,
+        headers=headers,
+        stat_result=stat_result,
     )
 
 
@@ -1,7 +1,7 @@
-from datetime import datetime
-from typing import Optional
+from datetime import date, datetime
+from typing import List, Optional
 
-from pydantic import BaseModel, constr
+from pydantic import BaseModel, constr, field_validator
 
 
 # User schemas
@@ -50,6 +50,34 @@ class ProgressResponse(BaseModel):
         from_attributes = True
 
 
+# 离线同步
+IdempotencyKey = constr(min_length=1, max_length=64)
+
+
+class ProgressDelta(BaseModel):
+    letter_id: int
+    stage: int
+    score: int
+    client_ts: Optional[datetime] = None
+    idempotency_key: Optional[IdempotencyKey] = None
+
+
+class CheckinEvent(BaseModel):
+    client_ts: datetime  # 客户端本地时间（带时区），决定打卡日期
+    idempotency_key: Optional[IdempotencyKey] = None
+
+
+class ProgressSyncRequest(BaseModel):
+    progress: List[ProgressDelta] = []
+    checkins: List[CheckinEvent] = []
+
+
+class ProgressSyncResponse(BaseModel):
+    progress: List[ProgressResponse]  # 合并后全部26个字母的进度
+    applied: int  # 本次实际生效的事件数
+    duplicates: int  # 因幂等键重复而跳过的事件数
+
+
 # Speech evaluation
 class SpeechEvalRequest(BaseModel):
     letter: str
@@ -64,9 +92,14 @@ class SpeechEvalResponse(BaseModel):
 
 # Checkin
 class CheckinResponse(BaseModel):
-    date: str
+    date: str  # YYYY-MM-DD
     letters_learned: int
 
+    @field_validator("date", mode="before")
+    @classmethod
+    def format_date(cls, v):
+        return v.isoformat() if isinstance(v, date) else v
+
     class Config:
         from_attributes = True
 
@@ -82,3 +115,7 @@ class RecordingResponse(BaseModel):
 
     class Config:
         from_attributes = True
+
+
+class SpeechEvalAndSaveResponse(SpeechEvalResponse):
+    recording: Optional[RecordingResponse] = None  # 录音文件保存失败时为空
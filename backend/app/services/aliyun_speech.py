@@ -24,20 +24,32 @@ from datetime import datetime
 
 import httpx
 from app.config import get_settings
+from app.services.speech_evaluator import SpeechBackendError, SpeechEvaluator, SpeechRequestError
 
 
-class AliyunSpeechEvaluator:
+class AliyunSpeechEvaluator(SpeechEvaluator):
     """阿里云语音评测客户端（使用HTTP API）"""
 
+    name = "aliyun"
+
     def __init__(self):
         self.settings = get_settings()
         self.access_key_id = self.settings.aliyun_access_key_id
         self.access_key_secret = self.settings.aliyun_access_key_secret
         self.app_key = self.settings.aliyun_app_key
+        self.api_url = self.settings.aliyun_api_url
 
         if not all([self.access_key_id, self.access_key_secret, self.app_key]):
             raise ValueError("阿里云配置不完整，请在.env文件中配置ALIYUN_ACCESS_KEY_ID等")
 
+        # 共享的连接池客户端，保持长连接，避免每次请求都重新握手
+        self._client: Optional[httpx.AsyncClient] = None
+
+        # 令牌缓存：过期前在后台刷新，请求不必等待
+        self._token: Optional[str] = None
+        self._token_expires_at = 0.0
+        self._token_refresh: Optional[asyncio.Task] = None
+
     def _generate_signature(self, method: str, url: str, params: dict, body: str = "") -> str:
         """生成阿里云API签名（简化版）"""
         # 对URL进行编码
@@ -62,8 +74,16 @@ class AliyunSpeechEvaluator:
 
         return base64.b64encode(signature).decode('utf-8')
 
+    @property
+    def cache_fingerprint(self) -> str:
+        return f"aliyun|{self.api_url}|{self.app_key}"
+
     def _get_token(self) -> str:
         """获取访问令牌"""
+        # 配置了静态令牌（本地模拟服务或自建网关）时不走SDK
+        if self.settings.aliyun_token:
+            return self.settings.aliyun_token
+
         # 使用SDK获取token
         import nls.token
 
@@ -73,15 +93,69 @@ class AliyunSpeechEvaluator:
         )
         return token
 
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                timeout=self.settings.aliyun_http_timeout_seconds,
+                limits=httpx.Limits(
+                    max_connections=self.settings.aliyun_http_max_connections,
+                    max_keepalive_connections=self.settings.aliyun_http_max_keepalive,
+                    keepalive_expiry=self.settings.aliyun_http_keepalive_expiry_seconds,
+                ),
+            )
+        return self._client
+
+    async def aclose(self) -> None:
+        """关闭连接池，停止令牌刷新"""
+        if self._token_refresh is not None:
+            self._token_refresh.cancel()
+        if self._client is not None:
+            await self._client.aclose()
+
+    async def _refresh_token(self) -> str:
+        # SDK 获取令牌是阻塞的网络请求，放到线程里执行
+        token = await asyncio.to_thread(self._get_token)
+        self._token = token
+        self._token_expires_at = time.time() + self.settings.aliyun_token_ttl_seconds
+        return token
+
+    async def _get_cached_token(self) -> str:
+        """
+        获取访问令牌（带缓存）
+
+        - 令牌有效且离过期还远：直接返回
+        - 快过期：返回当前令牌，同时在后台刷新
+        - 没有令牌或已过期：等待刷新完成；并发请求共享同一次刷新
+        """
+        now = time.time()
+        refresh_at = self._token_expires_at - self.settings.aliyun_token_refresh_margin_seconds
+        if self._token is not None and now < refresh_at:
+            return self._token
+
+        if self._token_refresh is None or self._token_refresh.done():
+            self._token_refresh = asyncio.create_task(self._refresh_token())
+            self._token_refresh.add_done_callback(self._log_refresh_failure)
+
+        if self._token is not None and now < self._token_expires_at:
+            return self._token
+
+        return await asyncio.shield(self._token_refresh)
+
+    @staticmethod
+    def _log_refresh_failure(task: asyncio.Task) -> None:
+        if not task.cancelled() and task.exception() is not None:
+            print(f"阿里云令牌后台刷新失败: {task.exception()}")
+
     async def _call_evaluation_api(self, audio_data: bytes, letter: str) -> dict:
         """
         调用阿里云语音评测HTTP API
         """
         # 获取访问令牌
-        token = self._get_token()
+        token = await self._get_cached_token()
 
         # 准备请求URL和参数
-        url = "https://nls-gateway.cn-shanghai.aliyuncs.com/stream/v1/asr"
+        url = self.api_url
 
         # 检测音频格式（通过文件头）
         audio_format = "wav"  # 默认
@@ -109,30 +183,24 @@ class AliyunSpeechEvaluator:
         # 生成签名
         params["signature"] = self._generate_signature("POST", "/stream/v1/asr", params)
 
-        # 准备音频数据
-        audio_base64 = base64.b64encode(audio_data).decode('utf-8')
-
-        # 构建请求体 - 根据实际格式调整
-        payload = {
-            "audio": audio_base64,
-            "aformat": audio_format,  # 使用检测到的格式
-            "sample_rate": 16000,
-            "text": letter.upper()
-        }
-
-        # 发送请求
+        # 音频以二进制直接上传，不再 base64 编码进 JSON（体积大三分之一）
         headers = {
-            "Content-Type": "application/json"
+            "Content-Type": "application/octet-stream",
+            "X-NLS-Token": token,
         }
 
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            response = await client.post(url, params=params, json=payload, headers=headers)
+        response = await self.client.post(url, params=params, content=audio_data, headers=headers)
 
-            if response.status_code != 200:
-                raise Exception(f"API请求失败: {response.status_code} - {response.text}")
+        if response.status_code != 200:
+            raise SpeechBackendError(f"API请求失败: {response.status_code} - {response.text}")
 
+        try:
             result = response.json()
-            return result
+        except ValueError as e:
+            raise SpeechBackendError(f"API响应不是合法的 JSON: {e}")
+        if not isinstance(result, dict):
+            raise SpeechBackendError(f"API响应格式错误: {response.text[:200]}")
+        return result
 
     async def evaluate(self, audio_data: bytes, letter: str) -> dict:
         """
@@ -147,7 +215,7 @@ class AliyunSpeechEvaluator:
         """
         # 如果没有音频数据或字母，返回错误
         if not audio_data or not letter:
-            raise ValueError("音频数据和字母不能为空")
+            raise SpeechRequestError("音频数据和字母不能为空")
 
         try:
             # 调用阿里云API
@@ -158,7 +226,7 @@ class AliyunSpeechEvaluator:
             if status != 20000000:
                 error_msg = result.get('message', '未知错误')
                 print(f"阿里云评测API错误: {error_msg}")
-                raise Exception(f"API错误: {error_msg}")
+                raise SpeechBackendError(f"API错误: {error_msg}")
 
             # 提取评测结果
             eval_result = result.get('result') or result.get('score')
@@ -196,6 +264,10 @@ class AliyunSpeechEvaluator:
                 "details": result
             }
 
+        except (TypeError, ValueError, AttributeError) as e:
+            # 结果字段类型不符合预期（如 score 是字符串），换后端重试
+            print(f"阿里云语音评估异常: {e}")
+            raise SpeechBackendError(f"API响应格式错误: {e}")
         except Exception as e:
             print(f"阿里云语音评估异常: {e}")
             raise  # 重新抛出异常，不使用模拟评估
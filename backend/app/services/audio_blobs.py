@@ -0,0 +1,89 @@
+"""
+录音文件引用计数
+
+每条录音记录引用一个按内容寻址的存储文件，audio_blobs.ref_count 记录引用数：
+- 保存录音时先在同一事务中 upsert 引用数并锁住该行，引用数为 1（新内容）时才上传文件
+- 替换/删除录音时引用数减一，降到 0 的文件在事务提交后由后台任务回收
+回收时同样锁住该行再删除文件，与并发保存相同内容的请求互斥，不会删掉刚被重新引用的文件。
+
+按内容寻址之前保存的旧录音是本地平铺文件，只被一条记录引用，不记引用数，替换后直接删除。
+"""
+
+import asyncio
+from pathlib import Path
+from typing import Optional
+
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.database import AsyncSessionLocal
+from app.models.models import AudioBlob
+from app.services.audio_store import AudioStore, get_audio_store, is_blob_key, legacy_audio_path
+
+
+async def acquire_blob(db: AsyncSession, store: AudioStore, key: str, size: int, src: Path) -> None:
+    """引用 key 一次；存储中还没有这份内容时把 src 存进去"""
+    stmt = insert(AudioBlob).values(key=key, size=size, ref_count=1)
+    result = await db.execute(
+        stmt.on_conflict_do_update(
+            index_elements=[AudioBlob.key],
+            set_={"ref_count": AudioBlob.ref_count + 1},
+        ).returning(AudioBlob.ref_count)
+    )
+    if result.scalar_one() == 1:
+        # 新内容，或引用已降到 0、尚未回收的旧内容（重新上传，内容相同可以覆盖）
+        await store.put(key, src)
+
+
+async def release_blob(db: AsyncSession, key: str) -> bool:
+    """去掉 key 的一次引用，返回是否已无引用（提交后应调用 collect_blob）"""
+    result = await db.execute(
+        AudioBlob.__table__.update()
+        .where(AudioBlob.key == key)
+        .values(ref_count=AudioBlob.ref_count - 1)
+        .returning(AudioBlob.ref_count)
+    )
+    remaining = result.scalar_one_or_none()
+    return remaining is not None and remaining <= 0
+
+
+async def collect_blob(key: str) -> None:
+    """回收无引用的文件（后台任务）"""
+    try:
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                select(AudioBlob).where(AudioBlob.key == key, AudioBlob.ref_count <= 0).with_for_update()
+            )
+            blob = result.scalar_one_or_none()
+            if blob is None:
+                return  # 已被重新引用或已回收
+            await get_audio_store().delete(key)
+            await db.delete(blob)
+            await db.commit()
+    except Exception as e:
+        print(f"回收录音文件失败: {key}: {e}")
+
+
+async def release_file(db: AsyncSession, file_path: Optional[str]) -> Optional[str]:
+    """
+    录音记录不再使用 file_path（存储键或旧录音的本地路径）
+
+    返回提交后需要交给 discard_file 回收的路径，仍有其他引用时返回 None。
+    """
+    if not file_path:
+        return None
+    if is_blob_key(file_path):
+        return file_path if await release_blob(db, file_path) else None
+    return file_path
+
+
+async def discard_file(file_path: str) -> None:
+    """回收 release_file 返回的文件（后台任务）"""
+    if is_blob_key(file_path):
+        await collect_blob(file_path)
+        return
+    try:
+        await asyncio.to_thread(legacy_audio_path(file_path).unlink, missing_ok=True)
+    except OSError as e:
+        print(f"删除旧录音失败: {file_path}: {e}")
@@ -0,0 +1,143 @@
+"""
+内存音频解码
+
+把上传的音频字节（webm/opus、mp3、wav、mp4、ogg）直接解码为
+16kHz 单声道 float32 NumPy 数组，不经过临时文件。
+流式识别时音频分块到达，由 PcmStreamDecoder / ContainerStreamDecoder 增量解码。
+"""
+
+import io
+
+import av
+import numpy as np
+
+from app.services.speech_evaluator import SpeechRequestError
+
+# Whisper 要求的采样率
+SAMPLE_RATE = 16000
+
+
+class AudioDecodeError(SpeechRequestError):
+    """音频无法解码"""
+
+
+def decode_audio_bytes(data: bytes, sampling_rate: int = SAMPLE_RATE) -> np.ndarray:
+    """
+    解码音频字节
+
+    Args:
+        data: 音频文件内容（容器格式由 PyAV 自动探测）
+        sampling_rate: 目标采样率
+
+    Returns:
+        单声道 float32 数组，取值范围 [-1, 1]
+    """
+    if not data:
+        raise AudioDecodeError("音频数据为空")
+
+    # 与 faster_whisper.decode_audio 一致：先重采样为 s16 再转 float32，保证下混音量相同
+    resampler = av.audio.resampler.AudioResampler(format="s16", layout="mono", rate=sampling_rate)
+    chunks = []
+
+    try:
+        with av.open(io.BytesIO(data), mode="r", metadata_errors="ignore") as container:
+            if not container.streams.audio:
+                raise AudioDecodeError("文件中没有音频流")
+
+            frames = container.decode(audio=0)
+            while True:
+                try:
+                    frame = next(frames)
+                except StopIteration:
+                    break
+                except av.error.InvalidDataError:
+                    # 浏览器录音结尾常有截断的帧，跳过即可
+                    continue
+                for out in resampler.resample(frame):
+                    chunks.append(out.to_ndarray().reshape(-1))
+
+            # 冲刷重采样器中残留的样本
+            for out in resampler.resample(None):
+                chunks.append(out.to_ndarray().reshape(-1))
+    except AudioDecodeError:
+        raise
+    except (av.error.FFmpegError, ValueError) as e:
+        raise AudioDecodeError(f"无法解析音频文件: {e}")
+
+    if not chunks:
+        return np.zeros(0, dtype=np.float32)
+    return np.concatenate(chunks).astype(np.float32) / 32768.0
+
+
+class PcmStreamDecoder:
+    """逐块解码 16 位小端单声道 PCM，必要时重采样到目标采样率"""
+
+    def __init__(self, input_rate: int, sampling_rate: int = SAMPLE_RATE):
+        if not 8000 <= input_rate <= 192000:
+            raise AudioDecodeError(f"不支持的采样率: {input_rate}")
+        self.input_rate = input_rate
+        self._leftover = b""
+        # 重采样器有内部状态，跨块连续，块边界不会产生杂音
+        self._resampler = None
+        if input_rate != sampling_rate:
+            self._resampler = av.audio.resampler.AudioResampler(format="s16", layout="mono", rate=sampling_rate)
+        self._pts = 0
+
+    def feed(self, data: bytes) -> np.ndarray:
+        """送入一块 PCM，返回新解码出的样本"""
+        data = self._leftover + data
+        usable = len(data) - len(data) % 2  # 半个样本留到下一块
+        self._leftover = data[usable:]
+        samples = np.frombuffer(data[:usable], dtype="<i2")
+        if len(samples) == 0:
+            return np.zeros(0, dtype=np.float32)
+
+        if self._resampler is not None:
+            frame = av.AudioFrame.from_ndarray(samples.reshape(1, -1), format="s16", layout="mono")
+            frame.sample_rate = self.input_rate
+            frame.pts = self._pts
+            self._pts += len(samples)
+            out = [f.to_ndarray().reshape(-1) for f in self._resampler.resample(frame)]
+            samples = np.concatenate(out) if out else np.zeros(0, dtype=np.int16)
+
+        return samples.astype(np.float32) / 32768.0
+
+    def flush(self) -> np.ndarray:
+        """输入结束，取出重采样器中残留的样本"""
+        if self._resampler is None:
+            return np.zeros(0, dtype=np.float32)
+        out = [f.to_ndarray().reshape(-1) for f in self._resampler.resample(None)]
+        if not out:
+            return np.zeros(0, dtype=np.float32)
+        return np.concatenate(out).astype(np.float32) / 32768.0
+
+
+class ContainerStreamDecoder:
+    """
+    逐块接收容器格式（MediaRecorder 的 webm/ogg/mp4 分片）
+
+    分片单独无法解码，只能累积后整体重新解码；单字母录音只有几十 KB，开销可以接受。
+    """
+
+    def __init__(self, sampling_rate: int = SAMPLE_RATE):
+        self.sampling_rate = sampling_rate
+        self._data = bytearray()
+        self._emitted = 0
+
+    def feed(self, data: bytes) -> np.ndarray:
+        """送入一块数据，返回相比上次新解码出的样本（阻塞调用）"""
+        self._data.extend(data)
+        try:
+            audio = decode_audio_bytes(bytes(self._data), self.sampling_rate)
+        except AudioDecodeError:
+            # 开头的分片可能还不够解析出容器头，等更多数据
+            if self._emitted == 0:
+                return np.zeros(0, dtype=np.float32)
+            raise
+
+        new = audio[self._emitted:]
+        self._emitted = len(audio)
+        return new
+
+    def flush(self) -> np.ndarray:
+        return np.zeros(0, dtype=np.float32)
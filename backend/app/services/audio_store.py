@@ -0,0 +1,277 @@
+"""
+录音文件存储
+
+录音按内容的 SHA-256 寻址，存放在按哈希前缀分片的目录下（ab/cd/abcd....webm），
+单个目录的文件数保持在较小规模；内容相同的录音只存一份，引用计数记在 audio_blobs 表中。
+
+两种后端：
+- local：本地目录（默认与旧录音同在 uploads/audio 下，nginx X-Accel-Redirect 配置不变）
+- s3：S3 兼容的对象存储（MinIO、各家云的 S3 兼容接口等），用 httpx 按 SigV4 签名请求，
+  本地测试可运行 python fake_s3_server.py
+"""
+
+import asyncio
+import hashlib
+import hmac
+import os
+import re
+import shutil
+import uuid
+from abc import ABC, abstractmethod
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Optional
+from urllib.parse import quote, urlsplit
+
+import httpx
+from fastapi import HTTPException, Request
+from fastapi.responses import FileResponse, Response, StreamingResponse
+from starlette.background import BackgroundTask
+
+from app.config import get_settings
+
+# 按内容寻址的录音文件名：<sha256>.<扩展名>
+BLOB_FILENAME_RE = re.compile(r"([0-9a-f]{64})\.([a-z0-9]{1,8})")
+# 存储中的键：<前2位>/<3-4位>/<sha256>.<扩展名>
+BLOB_KEY_RE = re.compile(r"[0-9a-f]{2}/[0-9a-f]{2}/[0-9a-f]{64}\.[a-z0-9]{1,8}")
+
+# 直接转发给对象存储的响应头（Range 请求需要）
+_PASSTHROUGH_HEADERS = ("content-length", "content-range", "accept-ranges")
+
+
+def blob_key(digest: str, ext: str) -> str:
+    return f"{digest[:2]}/{digest[2:4]}/{digest}.{ext}"
+
+
+def blob_key_from_filename(filename: str) -> Optional[str]:
+    """录音 URL 中的文件名对应的存储键；不是按内容寻址的文件名（旧录音）时返回 None"""
+    match = BLOB_FILENAME_RE.fullmatch(filename)
+    if match is None:
+        return None
+    return blob_key(match.group(1), match.group(2))
+
+
+def is_blob_key(file_path: str) -> bool:
+    """Recording.file_path 是存储键（否则是旧的本地文件路径）"""
+    return BLOB_KEY_RE.fullmatch(file_path) is not None
+
+
+def legacy_audio_path(file_path: str) -> Path:
+    """
+    旧录音在磁盘上的位置
+
+    旧记录中存的是保存时相对工作目录的路径（uploads/audio/<文件名>），
+    只取文件名，按 AUDIO_LEGACY_DIR 定位。
+    """
+    return Path(get_settings().audio_legacy_dir) / Path(file_path).name
+
+
+class AudioStore(ABC):
+    """录音存储后端"""
+
+    name: str = ""
+
+    @abstractmethod
+    async def put(self, key: str, src: Path) -> None:
+        """把本地临时文件存为 key（src 之后可能被移走）"""
+
+    @abstractmethod
+    async def get(self, key: str) -> bytes:
+        """读取 key 的全部内容（录音不超过几 MB）"""
+
+    @abstractmethod
+    async def delete(self, key: str) -> None:
+        """删除 key，不存在时忽略"""
+
+    @abstractmethod
+    async def serve(self, key: str, request: Request, media_type: str, headers: Dict[str, str]) -> Response:
+        """返回 key 的内容（支持 Range），headers 为要附加的缓存头"""
+
+    async def aclose(self) -> None:
+        pass
+
+
+class LocalAudioStore(AudioStore):
+    """本地目录存储"""
+
+    name = "local"
+
+    def __init__(self, root: str, accel_redirect_prefix: str = ""):
+        self.root = Path(root)
+        self.accel_redirect_prefix = accel_redirect_prefix
+
+    def path(self, key: str) -> Path:
+        return self.root / key
+
+    def _place(self, src: Path, dest: Path) -> None:
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            os.replace(src, dest)
+        except OSError:
+            # 临时目录与存储目录不在同一文件系统：复制到目标目录后再原子改名
+            tmp = dest.with_name(f".{dest.name}.{uuid.uuid4().hex}.tmp")
+            try:
+                shutil.copyfile(src, tmp)
+                os.replace(tmp, dest)
+            finally:
+                tmp.unlink(missing_ok=True)
+            src.unlink(missing_ok=True)
+
+    async def put(self, key: str, src: Path) -> None:
+        await asyncio.to_thread(self._place, src, self.path(key))
+
+    async def get(self, key: str) -> bytes:
+        return await asyncio.to_thread(self.path(key).read_bytes)
+
+    async def delete(self, key: str) -> None:
+        await asyncio.to_thread(self.path(key).unlink, missing_ok=True)
+
+    async def serve(self, key: str, request: Request, media_type: str, headers: Dict[str, str]) -> Response:
+        if self.accel_redirect_prefix:
+            headers = {**headers, "X-Accel-Redirect": self.accel_redirect_prefix.rstrip("/") + "/" + key}
+            return Response(media_type=media_type, headers=headers)
+        path = self.path(key)
+        try:
+            stat_result = path.stat()
+        except OSError:
+            raise HTTPException(status_code=404, detail="文件不存在")
+        return FileResponse(path=str(path), media_type=media_type, headers=headers, stat_result=stat_result)
+
+
+class S3AudioStore(AudioStore):
+    """S3 兼容对象存储（路径风格 URL：<endpoint>/<bucket>/<key>）"""
+
+    name = "s3"
+
+    def __init__(self, endpoint_url: str, bucket: str, access_key_id: str, secret_access_key: str, region: str):
+        self.endpoint_url = endpoint_url.rstrip("/")
+        self.bucket = bucket
+        self.access_key_id = access_key_id
+        self.secret_access_key = secret_access_key
+        self.region = region
+        self._host = urlsplit(self.endpoint_url).netloc
+        self._client: Optional[httpx.AsyncClient] = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(timeout=httpx.Timeout(30.0, connect=5.0))
+        return self._client
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def _request(self, method: str, key: str, payload_hash: str = "UNSIGNED-PAYLOAD", **kwargs) -> httpx.Request:
+        """构造带 AWS Signature V4 签名的请求"""
+        path = quote(f"/{self.bucket}/{key}", safe="/-_.~")
+        now = datetime.now(timezone.utc)
+        amz_date = now.strftime("%Y%m%dT%H%M%SZ")
+        datestamp = now.strftime("%Y%m%d")
+
+        signed = {"host": self._host, "x-amz-content-sha256": payload_hash, "x-amz-date": amz_date}
+        signed_names = ";".join(sorted(signed))
+        canonical_request = "\n".join([
+            method,
+            path,
+            "",  # 无查询参数
+            "".join(f"{name}:{signed[name]}\n" for name in sorted(signed)),
+            signed_names,
+            payload_hash,
+        ])
+        scope = f"{datestamp}/{self.region}/s3/aws4_request"
+        string_to_sign = "\n".join([
+            "AWS4-HMAC-SHA256",
+            amz_date,
+            scope,
+            hashlib.sha256(canonical_request.encode("utf-8")).hexdigest(),
+        ])
+        signing_key = ("AWS4" + self.secret_access_key).encode("utf-8")
+        for part in (datestamp, self.region, "s3", "aws4_request"):
+            signing_key = hmac.new(signing_key, part.encode("utf-8"), hashlib.sha256).digest()
+        signature = hmac.new(signing_key, string_to_sign.encode("utf-8"), hashlib.sha256).hexdigest()
+
+        headers = {
+            **kwargs.pop("headers", {}),
+            "x-amz-content-sha256": payload_hash,
+            "x-amz-date": amz_date,
+            "Authorization": (
+                f"AWS4-HMAC-SHA256 Credential={self.access_key_id}/{scope}, "
+                f"SignedHeaders={signed_names}, Signature={signature}"
+            ),
+        }
+        return self.client.build_request(method, self.endpoint_url + path, headers=headers, **kwargs)
+
+    async def put(self, key: str, src: Path) -> None:
+        # 录音不超过 5MB，整体读入后上传；键本身就是内容的 SHA-256，不必再算一遍
+        data = await asyncio.to_thread(src.read_bytes)
+        digest = BLOB_FILENAME_RE.fullmatch(key.rsplit("/", 1)[-1]).group(1)
+        response = await self.client.send(self._request("PUT", key, payload_hash=digest, content=data))
+        response.raise_for_status()
+        await asyncio.to_thread(src.unlink, missing_ok=True)
+
+    async def get(self, key: str) -> bytes:
+        response = await self.client.send(self._request("GET", key))
+        response.raise_for_status()
+        return response.content
+
+    async def delete(self, key: str) -> None:
+        response = await self.client.send(self._request("DELETE", key))
+        if response.status_code != 404:
+            response.raise_for_status()
+
+    async def serve(self, key: str, request: Request, media_type: str, headers: Dict[str, str]) -> Response:
+        upstream_headers = {}
+        if request.headers.get("range"):
+            upstream_headers["Range"] = request.headers["range"]
+        response = await self.client.send(self._request("GET", key, headers=upstream_headers), stream=True)
+        if response.status_code == 404:
+            await response.aclose()
+            raise HTTPException(status_code=404, detail="文件不存在")
+        if response.status_code == 416:
+            await response.aclose()
+            return Response(status_code=416, headers={"Content-Range": response.headers.get("content-range", "")})
+        if response.status_code >= 400:
+            await response.aclose()
+            raise HTTPException(status_code=502, detail="读取录音失败")
+
+        headers = {**headers, **{n: response.headers[n] for n in _PASSTHROUGH_HEADERS if n in response.headers}}
+        return StreamingResponse(
+            response.aiter_bytes(),
+            status_code=response.status_code,
+            media_type=media_type,
+            headers=headers,
+            background=BackgroundTask(response.aclose),
+        )
+
+
+# 全局实例
+_audio_store: Optional[AudioStore] = None
+
+
+def get_audio_store() -> AudioStore:
+    """按配置创建录音存储"""
+    global _audio_store
+    if _audio_store is None:
+        settings = get_settings()
+        if settings.audio_store == "s3":
+            _audio_store = S3AudioStore(
+                settings.s3_endpoint_url,
+                settings.s3_bucket,
+                settings.s3_access_key_id,
+                settings.s3_secret_access_key,
+                settings.s3_region,
+            )
+        elif settings.audio_store == "local":
+            _audio_store = LocalAudioStore(settings.audio_store_dir, settings.audio_accel_redirect_prefix)
+        else:
+            raise ValueError(f"未知的录音存储: {settings.audio_store}")
+    return _audio_store
+
+
+async def close_audio_store() -> None:
+    global _audio_store
+    if _audio_store is not None:
+        await _audio_store.aclose()
+        _audio_store = None
@@ -0,0 +1,98 @@
+"""
+录音转码
+
+把浏览器上传的录音（webm/opus、mp4/aac、wav 等）转为低码率单声道 Opus，
+并按 EBU R128 做响度归一化，回放时各条录音音量一致。
+全程在内存中完成，输出按位确定（相同输入得到相同字节），按内容寻址的去重仍然有效。
+"""
+
+import io
+
+import av
+
+from app.services.audio_decode import AudioDecodeError
+
+# Opus 编码采样率
+OPUS_SAMPLE_RATE = 48000
+# 支持的输出容器：webm（浏览器兼容性最好）或 ogg
+TRANSCODE_CONTAINERS = ("webm", "ogg")
+
+
+def _build_filter_graph(stream: "av.audio.stream.AudioStream", loudness: float) -> av.filter.Graph:
+    """下混为单声道 -> 响度归一化 -> 重采样到 48kHz"""
+    graph = av.filter.Graph()
+    chain = [
+        graph.add_abuffer(template=stream),
+        graph.add("aformat", "channel_layouts=mono"),
+        graph.add("loudnorm", f"I={loudness}:TP=-1.5:LRA=11"),
+        graph.add("aresample", str(OPUS_SAMPLE_RATE)),
+        graph.add("abuffersink"),
+    ]
+    for upstream, downstream in zip(chain, chain[1:]):
+        upstream.link_to(downstream)
+    graph.configure()
+    return graph
+
+
+def transcode_to_opus(data: bytes, container: str = "webm", bitrate: int = 24000, loudness: float = -16.0) -> bytes:
+    """
+    转码为单声道 Opus（阻塞调用，在线程池中执行）
+
+    Args:
+        data: 原始录音内容（容器格式由 PyAV 自动探测）
+        container: 输出容器，见 TRANSCODE_CONTAINERS
+        bitrate: Opus 码率（bps）
+        loudness: 目标响度（LUFS）
+
+    Returns:
+        转码后的文件内容
+    """
+    if container not in TRANSCODE_CONTAINERS:
+        raise ValueError(f"不支持的转码容器: {container}")
+    if not data:
+        raise AudioDecodeError("音频数据为空")
+
+    output = io.BytesIO()
+    try:
+        with av.open(io.BytesIO(data), mode="r", metadata_errors="ignore") as src:
+            if not src.streams.audio:
+                raise AudioDecodeError("文件中没有音频流")
+            in_stream = src.streams.audio[0]
+            graph = _build_filter_graph(in_stream, loudness)
+
+            # bitexact：不写入编码器版本、随机流序号等，保证输出可复现
+            with av.open(output, mode="w", format=container, options={"fflags": "+bitexact"}) as dst:
+                out_stream = dst.add_stream("libopus", rate=OPUS_SAMPLE_RATE, layout="mono")
+                out_stream.bit_rate = bitrate
+                out_stream.codec_context.flags |= av.codec.context.Flags.bitexact
+
+                def drain() -> None:
+                    while True:
+                        try:
+                            frame = graph.pull()
+                        except (av.error.BlockingIOError, av.error.EOFError):
+                            return
+                        dst.mux(out_stream.encode(frame))
+
+                frames = src.decode(in_stream)
+                while True:
+                    try:
+                        frame = next(frames)
+                    except StopIteration:
+                        break
+                    except av.error.InvalidDataError:
+                        # 浏览器录音结尾常有截断的帧，跳过即可
+                        continue
+                    frame.pts = None  # 由滤镜按样本数重新计时，源文件时间戳可能不连续
+                    graph.push(frame)
+                    drain()
+
+                graph.push(None)
+                drain()
+                dst.mux(out_stream.encode(None))
+    except AudioDecodeError:
+        raise
+    except (av.error.FFmpegError, ValueError) as e:
+        raise AudioDecodeError(f"无法转码音频文件: {e}")
+
+    return output.getvalue()
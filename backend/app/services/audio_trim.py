@@ -0,0 +1,160 @@
+"""
+静音裁剪
+
+基于短时能量的轻量 VAD，针对一两秒的单字母/单词录音：
+裁掉开头结尾的静音（保留少量余量），识别纯静音录音，并限制最长语音时长。
+"""
+
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+import numpy as np
+
+from app.services.audio_decode import SAMPLE_RATE
+
+FRAME_MS = 20
+# 至少连续这么多帧高于阈值才算语音，过滤按键声、爆音
+MIN_SPEECH_FRAMES = 3
+# 噪声底之上多少 dB 算语音
+NOISE_MARGIN_DB = 12.0
+# 最响帧与噪声底相差不到这么多 dB 视为平稳噪声/静音（语音的音节起伏远大于此）
+MIN_DYNAMIC_DB = 6.0
+
+
+@dataclass
+class TrimResult:
+    audio: np.ndarray
+    has_speech: bool
+    original_duration: float
+    trimmed_duration: float
+    truncated: bool  # 语音超过最长时长被截断
+
+
+def _frame_db(audio: np.ndarray, frame_len: int) -> np.ndarray:
+    """每帧的能量（dBFS），不足一帧的尾部忽略"""
+    n_frames = len(audio) // frame_len
+    frames = audio[:n_frames * frame_len].reshape(n_frames, frame_len)
+    rms = np.sqrt(np.mean(np.square(frames, dtype=np.float64), axis=1))
+    return 20 * np.log10(rms + 1e-10)
+
+
+def _speech_mask(db: np.ndarray, silence_floor_db: float) -> Optional[np.ndarray]:
+    """
+    标记语音帧
+
+    Returns:
+        与 db 等长的布尔数组；没有语音时返回 None
+    """
+    if len(db) == 0:
+        return None
+
+    noise_floor = np.percentile(db, 10)
+    dynamic = db.max() - noise_floor
+    if db.max() < silence_floor_db or dynamic < MIN_DYNAMIC_DB:
+        return None
+
+    # 几乎通篇说话的录音噪声底就是语音电平，阈值取动态范围的一半避免把语音裁掉
+    threshold = max(silence_floor_db, noise_floor + min(NOISE_MARGIN_DB, dynamic / 2))
+    active = db > threshold
+
+    # 只保留足够长的连续语音段
+    speech = np.zeros(len(db), dtype=bool)
+    run_start = None
+    for i, is_active in enumerate(np.append(active, False)):
+        if is_active and run_start is None:
+            run_start = i
+        elif not is_active and run_start is not None:
+            if i - run_start >= MIN_SPEECH_FRAMES:
+                speech[run_start:i] = True
+            run_start = None
+
+    return speech if speech.any() else None
+
+
+def trim_silence(
+    audio: np.ndarray,
+    silence_floor_db: float = -50.0,
+    padding_ms: int = 200,
+    max_speech_seconds: float = 10.0,
+    sampling_rate: int = SAMPLE_RATE,
+) -> TrimResult:
+    """
+    裁剪静音
+
+    Args:
+        audio: 单声道 float32 音频
+        silence_floor_db: 绝对静音阈值（dBFS），低于它的帧一律视为静音
+        padding_ms: 语音区间前后保留的余量
+        max_speech_seconds: 最长语音时长，超出部分丢弃
+    """
+    original_duration = len(audio) / sampling_rate
+    frame_len = sampling_rate * FRAME_MS // 1000
+
+    speech = _speech_mask(_frame_db(audio, frame_len), silence_floor_db)
+    if speech is None:
+        return TrimResult(audio[:0], False, original_duration, 0.0, False)
+
+    speech_frames = np.flatnonzero(speech)
+    pad = padding_ms * sampling_rate // 1000
+    start = max(0, speech_frames[0] * frame_len - pad)
+    end = min(len(audio), (speech_frames[-1] + 1) * frame_len + pad)
+
+    max_samples = int(max_speech_seconds * sampling_rate)
+    truncated = end - start > max_samples
+    if truncated:
+        end = start + max_samples
+
+    trimmed = audio[start:end]
+    return TrimResult(trimmed, True, original_duration, len(trimmed) / sampling_rate, truncated)
+
+
+class StreamingVAD:
+    """
+    流式能量 VAD
+
+    音频分块送入，与 trim_silence 使用同一套判定；
+    已检测到语音且其后连续静音达到 end_silence_ms 时认为说完了。
+    """
+
+    def __init__(
+        self,
+        silence_floor_db: float = -50.0,
+        end_silence_ms: int = 600,
+        sampling_rate: int = SAMPLE_RATE,
+    ):
+        self.silence_floor_db = silence_floor_db
+        self.sampling_rate = sampling_rate
+        self.frame_len = sampling_rate * FRAME_MS // 1000
+        self.end_silence_frames = max(1, end_silence_ms // FRAME_MS)
+
+        self._remainder = np.zeros(0, dtype=np.float32)
+        self._db = np.zeros(0)
+        self._speech: Optional[np.ndarray] = None
+
+    def feed(self, samples: np.ndarray) -> None:
+        """送入新的样本（只计算新增帧的能量）"""
+        samples = np.concatenate([self._remainder, samples])
+        n_frames = len(samples) // self.frame_len
+        self._remainder = samples[n_frames * self.frame_len:]
+        if n_frames == 0:
+            return
+
+        self._db = np.append(self._db, _frame_db(samples, self.frame_len))
+        # 噪声底随输入更新，所以每次都对全部帧重新判定（单字母录音最多几百帧）
+        self._speech = _speech_mask(self._db, self.silence_floor_db)
+
+    @property
+    def speech_range(self) -> Optional[Tuple[int, int]]:
+        """已检测到的语音区间（样本下标，左闭右开）"""
+        if self._speech is None:
+            return None
+        speech_frames = np.flatnonzero(self._speech)
+        return int(speech_frames[0]) * self.frame_len, (int(speech_frames[-1]) + 1) * self.frame_len
+
+    @property
+    def ended(self) -> bool:
+        """语音已结束"""
+        if self._speech is None:
+            return False
+        last_speech = np.flatnonzero(self._speech)[-1]
+        return len(self._db) - 1 - last_speech >= self.end_silence_frames
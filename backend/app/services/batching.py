@@ -0,0 +1,131 @@
+"""
+动态微批调度
+
+把短时间窗口内到达的多个请求合并成一批，交给推理线程池一次处理，
+再把各自的结果分发回等待中的协程。
+"""
+
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Set
+
+from app.services.executor import BoundedExecutor, ExecutorBusyError
+from app.services.metrics import Histogram
+
+
+@dataclass
+class _PendingRequest:
+    payload: Any
+    future: asyncio.Future
+    enqueued_at: float
+
+
+class BatchScheduler:
+    """
+    微批调度器
+
+    凑满 max_batch_size 个请求或等待超过 max_wait_ms 即发出一批。
+    run_batch 在线程池中执行，接收 payload 列表，按相同顺序返回结果列表；
+    某一项的结果若是异常实例，则只让对应请求失败。
+    """
+
+    def __init__(
+        self,
+        name: str,
+        run_batch: Callable[[List[Any]], List[Any]],
+        executor: BoundedExecutor,
+        max_batch_size: int,
+        max_wait_ms: float,
+    ):
+        self.name = name
+        self.run_batch = run_batch
+        self.executor = executor
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000
+
+        self._queue: List[_PendingRequest] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks: Set[asyncio.Task] = set()
+
+        self._batches = 0
+        self._items = 0
+        self.fill_ratio = Histogram([0.125, 0.25, 0.5, 0.75, 1.0])
+        self.queue_delay_ms = Histogram([5, 10, 25, 50, 100, 250, 500, 1000, 5000])
+
+    async def submit(self, payload: Any) -> Any:
+        """提交一个请求并等待其结果"""
+        # 等待中的请求最多填满线程池容量对应的批次，再多就直接拒绝
+        if len(self._queue) >= self.max_batch_size * self.executor.capacity:
+            raise ExecutorBusyError(self.name, self.executor.retry_after)
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._queue.append(_PendingRequest(payload, future, time.perf_counter()))
+
+        if len(self._queue) >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self._flush)
+
+        return await future
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        # 跳过已被取消的请求（客户端断开等）
+        self._queue = [r for r in self._queue if not r.future.done()]
+        batch = self._queue[:self.max_batch_size]
+        self._queue = self._queue[self.max_batch_size:]
+
+        if self._queue:
+            loop = asyncio.get_running_loop()
+            if len(self._queue) >= self.max_batch_size:
+                loop.call_soon(self._flush)
+            else:
+                self._timer = loop.call_later(self.max_wait, self._flush)
+
+        if batch:
+            task = asyncio.ensure_future(self._dispatch(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _dispatch(self, batch: List[_PendingRequest]) -> None:
+        self._batches += 1
+        self._items += len(batch)
+        self.fill_ratio.observe(len(batch) / self.max_batch_size)
+
+        def call(payloads: List[Any]):
+            return time.perf_counter(), self.run_batch(payloads)
+
+        try:
+            started_at, results = await self.executor.run(call, [r.payload for r in batch])
+        except Exception as e:
+            for r in batch:
+                if not r.future.done():
+                    r.future.set_exception(e)
+            return
+
+        for r, result in zip(batch, results):
+            self.queue_delay_ms.observe((started_at - r.enqueued_at) * 1000)
+            if r.future.done():
+                continue
+            if isinstance(result, BaseException):
+                r.future.set_exception(result)
+            else:
+                r.future.set_result(result)
+
+    def stats(self) -> Dict[str, Any]:
+        """批处理指标：批次数、平均批大小、填充率与排队延迟分布"""
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000,
+            "waiting": len(self._queue),
+            "batches": self._batches,
+            "items": self._items,
+            "avg_batch_size": round(self._items / self._batches, 2) if self._batches else 0.0,
+            "fill_ratio": self.fill_ratio.snapshot(),
+            "queue_delay_ms": self.queue_delay_ms.snapshot(),
+        }
@@ -0,0 +1,132 @@
+"""
+有界线程池
+
+把阻塞的 CPU 密集型调用（Whisper 推理等）移出事件循环执行，
+并限制排队长度：队列满时立即拒绝，而不是让请求无限堆积。
+"""
+
+import asyncio
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+
+class ExecutorBusyError(Exception):
+    """线程池排队已满"""
+
+    def __init__(self, name: str, retry_after: int):
+        super().__init__(f"{name} 排队已满")
+        self.retry_after = retry_after
+
+
+class ExecutorTimeoutError(Exception):
+    """任务在规定时间内未完成"""
+
+    def __init__(self, name: str, timeout: float, retry_after: int):
+        super().__init__(f"{name} 执行超时（{timeout}s）")
+        self.retry_after = retry_after
+
+
+class BoundedExecutor:
+    """带排队上限和超时的线程池"""
+
+    def __init__(
+        self,
+        name: str,
+        max_workers: int,
+        max_queue: int,
+        timeout: Optional[float] = None,
+        retry_after: int = 1,
+    ):
+        self.name = name
+        self.max_workers = max(1, max_workers)
+        self.max_queue = max(0, max_queue)
+        self.timeout = timeout
+        self.retry_after = retry_after
+        self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix=name)
+
+        # 计数器只在事件循环线程中修改
+        self._pending = 0  # 已提交但线程尚未结束的任务（含超时后仍在运行的）
+        self._running = 0
+        self._completed = 0
+        self._rejected = 0
+        self._timeouts = 0
+        self._queue_wait_total = 0.0
+        self._run_time_total = 0.0
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    @property
+    def capacity(self) -> int:
+        return self.max_workers + self.max_queue
+
+    def _release(self, started: list, submitted_at: float, cf: Future) -> None:
+        self._pending -= 1
+        if started:
+            self._running -= 1
+            self._completed += 1
+            self._queue_wait_total += started[0] - submitted_at
+            self._run_time_total += time.perf_counter() - started[0]
+
+    async def run(self, fn: Callable[..., Any], *args: Any, timeout: Optional[float] = None) -> Any:
+        """
+        在线程池中执行 fn(*args)
+
+        timeout 为 None 时使用默认超时，为 0 时不限时。
+
+        Raises:
+            ExecutorBusyError: 排队已满
+            ExecutorTimeoutError: 超过 timeout 仍未完成
+        """
+        if self._pending >= self.capacity:
+            self._rejected += 1
+            raise ExecutorBusyError(self.name, self.retry_after)
+
+        loop = asyncio.get_running_loop()
+        submitted_at = time.perf_counter()
+        started: list = []
+
+        def call():
+            started.append(time.perf_counter())
+            loop.call_soon_threadsafe(self._mark_running)
+            return fn(*args)
+
+        self._pending += 1
+        cf = self._pool.submit(call)
+        # 线程真正结束（或排队中被取消）才释放名额，超时的任务不会让池子超卖
+        cf.add_done_callback(
+            lambda f: loop.call_soon_threadsafe(self._release, started, submitted_at, f)
+        )
+
+        timeout = self.timeout if timeout is None else timeout
+        if not timeout:
+            timeout = None
+        try:
+            return await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(cf)), timeout)
+        except asyncio.TimeoutError:
+            cf.cancel()  # 仍在排队的任务直接取消；已在运行的只能等它自然结束
+            self._timeouts += 1
+            raise ExecutorTimeoutError(self.name, timeout, self.retry_after)
+
+    def _mark_running(self) -> None:
+        self._running += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """线程池运行指标"""
+        return {
+            "workers": self.max_workers,
+            "max_queue": self.max_queue,
+            "pending": self._pending,
+            "running": self._running,
+            "queued": max(0, self._pending - self._running),
+            "completed": self._completed,
+            "rejected": self._rejected,
+            "timeouts": self._timeouts,
+            "avg_queue_wait_ms": round(self._queue_wait_total / self._completed * 1000, 2) if self._completed else 0.0,
+            "avg_run_ms": round(self._run_time_total / self._completed * 1000, 2) if self._completed else 0.0,
+        }
+
+    def shutdown(self) -> None:
+        self._pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,140 @@
+"""
+字母快速分类
+
+孩子的录音几乎总是 26 个字母名或对应单词之一。与其做开放词表的束搜索，
+不如直接给这 52 个候选打分（teacher forcing：把候选的 token 逐个喂给解码器，
+累加各 token 的对数概率），只有没有候选足够可信时才回退到完整识别。
+
+解码器第一步同时给出所有候选首 token 的概率；多数候选只有一个 token，
+"Elephant"、"Watermelon"、"X-ray" 等多 token 候选再按前缀补算后续 token。
+"""
+
+import math
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Dict, List, Sequence, Tuple
+
+import ctranslate2
+import numpy as np
+from faster_whisper import WhisperModel
+from faster_whisper.tokenizer import Tokenizer
+
+
+# 多 token 候选的首 token 概率低于此值时不再补算，按概率 0 处理（整体概率只会更低，不可能被采用）
+EXTEND_MIN_LOGPROB = math.log(1e-3)
+
+
+@dataclass
+class Candidate:
+    letter: str
+    text: str
+    token_ids: Tuple[int, ...]
+
+
+@dataclass
+class ScoredCandidate:
+    letter: str
+    text: str
+    logprob: float
+
+    @property
+    def probability(self) -> float:
+        return math.exp(self.logprob)
+
+
+def _to_numpy(view: ctranslate2.StorageView) -> np.ndarray:
+    if view.device != "cpu":
+        view = view.to_device(ctranslate2.Device.cpu)
+    return np.array(view).astype(np.float32).reshape(-1)
+
+
+def _log_softmax(logits: np.ndarray) -> np.ndarray:
+    peak = logits.max()
+    return logits - (peak + np.log(np.exp(logits - peak).sum()))
+
+
+def _repeat_row(view: ctranslate2.StorageView, row: int, count: int) -> ctranslate2.StorageView:
+    """取编码结果中的一条音频并复制 count 份（同一条音频上并行解码多个前缀）"""
+    on_cpu = view.device == "cpu"
+    array = np.array(view if on_cpu else view.to_device(ctranslate2.Device.cpu))
+    repeated = ctranslate2.StorageView.from_array(np.ascontiguousarray(np.repeat(array[row:row + 1], count, axis=0)))
+    return repeated if on_cpu else repeated.to_device(ctranslate2.Device.cuda)
+
+
+class LetterClassifier:
+    """在字母名 + 单词这 52 个已知目标上给音频打分"""
+
+    def __init__(self, model: WhisperModel, tokenizer: Tokenizer, targets: Dict[str, str]):
+        """
+        Args:
+            model: 已加载的 Whisper 模型
+            tokenizer: 与识别时相同语言/任务的分词器
+            targets: 字母 → 单词映射
+        """
+        self.model = model
+        self.prompt = model.get_prompt(tokenizer, previous_tokens=[], without_timestamps=True)
+
+        self.candidates: List[Candidate] = [
+            Candidate(letter, text, tuple(tokenizer.encode(" " + text)))
+            for letter, word in targets.items()
+            for text in (letter, word)
+        ]
+
+    def _next_logprobs(self, encoder_output: ctranslate2.StorageView, prefixes: Sequence[Tuple[int, ...]]) -> List[np.ndarray]:
+        """
+        每个前缀之后下一个 token 的对数概率分布（一次解码步）
+
+        encoder_output 与 prefixes 一一对应；同一批的前缀须等长。
+        """
+        prefix_length = len(prefixes[0])
+        results = self.model.model.generate(
+            encoder_output,
+            [self.prompt + list(prefix) for prefix in prefixes],
+            beam_size=1,
+            max_length=len(self.prompt) + prefix_length + 1,
+            return_logits_vocab=True,
+            suppress_blank=False,
+            suppress_tokens=[],
+        )
+        return [_log_softmax(_to_numpy(result.logits[0][0])) for result in results]
+
+    def rank(self, encoder_output: ctranslate2.StorageView, batch_size: int) -> List[List[ScoredCandidate]]:
+        """
+        对已编码的一批音频排序候选
+
+        Returns:
+            每条音频一个按对数概率从高到低排序的候选列表
+        """
+        ranked = []
+        first_steps = self._next_logprobs(encoder_output, [()] * batch_size)
+        for row, first_step in enumerate(first_steps):
+            scores = [float(first_step[c.token_ids[0]]) for c in self.candidates]
+
+            # 多 token 候选：按前缀补算后续 token，同长度的前缀一次解码
+            extend = []
+            for i, c in enumerate(self.candidates):
+                if len(c.token_ids) > 1:
+                    if scores[i] >= EXTEND_MIN_LOGPROB:
+                        extend.append(i)
+                    else:
+                        scores[i] = -math.inf
+            by_length: Dict[int, set] = defaultdict(set)
+            for i in extend:
+                token_ids = self.candidates[i].token_ids
+                for k in range(1, len(token_ids)):
+                    by_length[k].add(token_ids[:k])
+            next_logprobs: Dict[Tuple[int, ...], np.ndarray] = {}
+            for prefixes in by_length.values():
+                prefixes = sorted(prefixes)
+                rows = _repeat_row(encoder_output, row, len(prefixes))
+                next_logprobs.update(zip(prefixes, self._next_logprobs(rows, prefixes)))
+            for i in extend:
+                token_ids = self.candidates[i].token_ids
+                scores[i] += sum(float(next_logprobs[token_ids[:k]][token_ids[k]]) for k in range(1, len(token_ids)))
+
+            ranked.append(sorted(
+                (ScoredCandidate(c.letter, c.text, s) for c, s in zip(self.candidates, scores)),
+                key=lambda c: c.logprob,
+                reverse=True,
+            ))
+        return ranked
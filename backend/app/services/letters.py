@@ -0,0 +1,61 @@
+"""
+字母表
+
+26个字母及对应的单词、图片，后端唯一的数据来源（与前端 learning.js 保持一致）。
+/api/letters 的响应体在导入时编码并压缩好，请求时直接返回字节。
+"""
+
+import gzip
+import hashlib
+import json
+from dataclasses import asdict, dataclass
+from typing import Dict, Tuple
+
+
+@dataclass(frozen=True)
+class Letter:
+    id: int  # 1-26 对应 A-Z
+    letter: str
+    word: str
+    image: str
+
+
+LETTERS: Tuple[Letter, ...] = (
+    Letter(1, "A", "Apple", "🍎"),
+    Letter(2, "B", "Ball", "⚽"),
+    Letter(3, "C", "Cat", "🐱"),
+    Letter(4, "D", "Dog", "🐶"),
+    Letter(5, "E", "Elephant", "🐘"),
+    Letter(6, "F", "Fish", "🐟"),
+    Letter(7, "G", "Grape", "🍇"),
+    Letter(8, "H", "House", "🏠"),
+    Letter(9, "I", "Ice cream", "🍦"),
+    Letter(10, "J", "Juice", "🧃"),
+    Letter(11, "K", "Kite", "🪁"),
+    Letter(12, "L", "Lion", "🦁"),
+    Letter(13, "M", "Moon", "🌙"),
+    Letter(14, "N", "Nest", "🪺"),
+    Letter(15, "O", "Orange", "🍊"),
+    Letter(16, "P", "Panda", "🐼"),
+    Letter(17, "Q", "Queen", "👸"),
+    Letter(18, "R", "Rainbow", "🌈"),
+    Letter(19, "S", "Sun", "☀️"),
+    Letter(20, "T", "Tiger", "🐯"),
+    Letter(21, "U", "Umbrella", "☂️"),
+    Letter(22, "V", "Violin", "🎻"),
+    Letter(23, "W", "Watermelon", "🍉"),
+    Letter(24, "X", "X-ray", "🩻"),
+    Letter(25, "Y", "Yo-yo", "🪀"),
+    Letter(26, "Z", "Zebra", "🦓"),
+)
+
+# 字母到单词的映射（语音评估用）
+LETTER_WORD_MAP: Dict[str, str] = {item.letter: item.word for item in LETTERS}
+
+# /api/letters 的响应体：紧凑 JSON 及其 gzip 压缩版本
+LETTERS_JSON: bytes = json.dumps(
+    [asdict(item) for item in LETTERS], ensure_ascii=False, separators=(",", ":")
+).encode("utf-8")
+LETTERS_JSON_GZIP: bytes = gzip.compress(LETTERS_JSON, compresslevel=9, mtime=0)
+# 压缩与否内容相同，用弱 ETag
+LETTERS_ETAG = 'W/"' + hashlib.sha256(LETTERS_JSON).hexdigest()[:16] + '"'
@@ -0,0 +1,36 @@
+"""
+轻量运行指标
+
+进程内计数，供 /api/metrics 输出；不依赖外部监控组件。
+"""
+
+import bisect
+from typing import Dict, Sequence
+
+
+class Histogram:
+    """固定分桶直方图（累计计数，语义同 Prometheus 的 le 分桶）"""
+
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = sorted(buckets)
+        self._counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self._counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def snapshot(self) -> Dict:
+        cumulative = 0
+        buckets = {}
+        for bound, n in zip(self.buckets, self._counts):
+            cumulative += n
+            buckets[f"le_{bound:g}"] = cumulative
+        buckets["le_inf"] = self.count
+        return {
+            "count": self.count,
+            "avg": round(self.sum / self.count, 3) if self.count else 0.0,
+            "buckets": buckets,
+        }
@@ -0,0 +1,225 @@
+"""
+语音评估结果缓存
+
+以 音频内容哈希 + 目标字母 + 模型配置 为键：
+- 进程内 LRU 层，命中只需一次字典查找
+- 可选磁盘层，带 TTL 和总大小上限，进程重启后仍可命中
+同一段录音的并发请求（连点两次）只会跑一次评估。
+"""
+
+import asyncio
+import copy
+import hashlib
+import json
+import os
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from app.config import get_settings
+
+
+class ResultCache:
+    """两级结果缓存"""
+
+    def __init__(
+        self,
+        max_entries: int,
+        ttl_seconds: float,
+        disk_dir: str = "",
+        disk_max_bytes: int = 0,
+    ):
+        self.max_entries = max_entries
+        self.ttl = ttl_seconds
+        self._memory: "OrderedDict[str, Tuple[float, Dict]]" = OrderedDict()
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+        self.disk_dir = Path(disk_dir) if disk_dir else None
+        self.disk_max_bytes = disk_max_bytes
+        self._disk_bytes: Optional[int] = None  # 首次写入时扫描目录得到
+
+        self._hits_memory = 0
+        self._hits_disk = 0
+        self._misses = 0
+        self._coalesced = 0
+
+    @staticmethod
+    def make_key(audio_data: bytes, letter: str, fingerprint: str) -> str:
+        digest = hashlib.sha256(audio_data)
+        digest.update(f"|{letter}|{fingerprint}".encode("utf-8"))
+        return digest.hexdigest()
+
+    async def get_or_compute(self, key: str, compute: Callable[[], Awaitable[Dict]]) -> Dict:
+        """命中则直接返回，否则计算并写入缓存；相同键的并发请求共享一次计算"""
+        value = await self.get(key)
+        if value is not None:
+            return value
+
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            self._coalesced += 1
+            try:
+                return copy.deepcopy(await asyncio.shield(inflight))
+            except asyncio.CancelledError:
+                if not inflight.cancelled():
+                    raise  # 是自己被取消
+                # 发起计算的请求中途断开，自己重新计算
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            value = await compute()
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()  # 没有其他等待者时避免 "exception was never retrieved"
+            raise
+        except BaseException:
+            future.cancel()
+            raise
+        else:
+            future.set_result(value)
+            await self.set(key, value)
+            return copy.deepcopy(value)
+        finally:
+            if self._inflight.get(key) is future:
+                del self._inflight[key]
+
+    async def get(self, key: str) -> Optional[Dict]:
+        entry = self._memory.get(key)
+        if entry is not None:
+            expires_at, value = entry
+            if expires_at > time.time():
+                self._memory.move_to_end(key)
+                self._hits_memory += 1
+                return copy.deepcopy(value)
+            del self._memory[key]
+
+        if self.disk_dir is not None:
+            value = await asyncio.to_thread(self._disk_get, key)
+            if value is not None:
+                self._hits_disk += 1
+                self._memory_set(key, value)
+                return copy.deepcopy(value)
+
+        self._misses += 1
+        return None
+
+    async def set(self, key: str, value: Dict) -> None:
+        self._memory_set(key, copy.deepcopy(value))
+        if self.disk_dir is not None:
+            await asyncio.to_thread(self._disk_set, key, value)
+
+    def _memory_set(self, key: str, value: Dict) -> None:
+        self._memory[key] = (time.time() + self.ttl, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def _disk_path(self, key: str) -> Path:
+        # 按哈希前两位分目录，避免单目录文件过多
+        return self.disk_dir / key[:2] / f"{key}.json"
+
+    def _disk_get(self, key: str) -> Optional[Dict]:
+        path = self._disk_path(key)
+        try:
+            if path.stat().st_mtime + self.ttl < time.time():
+                self._disk_remove(path)
+                return None
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _disk_set(self, key: str, value: Dict) -> None:
+        path = self._disk_path(key)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            data = json.dumps(value, ensure_ascii=False).encode("utf-8")
+            tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            # 覆盖已有文件时只按大小差值计入总量
+            try:
+                old_size = path.stat().st_size
+            except FileNotFoundError:
+                old_size = 0
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"写入评估缓存失败: {e}")
+            return
+
+        if self._disk_bytes is None:
+            self._disk_bytes = sum(p.stat().st_size for p in self.disk_dir.glob("*/*.json"))
+        else:
+            self._disk_bytes += len(data) - old_size
+        if self.disk_max_bytes and self._disk_bytes > self.disk_max_bytes:
+            self._disk_evict()
+
+    def _disk_remove(self, path: Path) -> None:
+        try:
+            size = path.stat().st_size
+            path.unlink()
+            if self._disk_bytes is not None:
+                self._disk_bytes -= size
+        except OSError:
+            pass
+
+    def _disk_evict(self) -> None:
+        """先删过期文件，再按修改时间从旧到新删，直到降到上限的 90%"""
+        entries = []
+        for p in self.disk_dir.glob("*/*.json"):
+            try:
+                st = p.stat()
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, p))
+        entries.sort()
+
+        total = sum(size for _, size, _ in entries)
+        target = self.disk_max_bytes * 0.9
+        now = time.time()
+        for mtime, size, p in entries:
+            if total <= target and mtime + self.ttl >= now:
+                break
+            try:
+                p.unlink()
+                total -= size
+            except OSError:
+                pass
+        self._disk_bytes = total
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self._hits_memory + self._hits_disk + self._misses
+        # 合并到进行中计算的请求同样没有重复评估，计入命中
+        hits = self._hits_memory + self._hits_disk + self._coalesced
+        return {
+            "entries": len(self._memory),
+            "max_entries": self.max_entries,
+            "hits_memory": self._hits_memory,
+            "hits_disk": self._hits_disk,
+            "misses": self._misses,
+            "coalesced": self._coalesced,
+            "hit_rate": round(hits / lookups, 3) if lookups else 0.0,
+            "disk_bytes": self._disk_bytes if self.disk_dir is not None else None,
+        }
+
+
+# 全局实例
+_result_cache: Optional[ResultCache] = None
+
+
+def get_result_cache() -> Optional[ResultCache]:
+    """获取结果缓存实例，未开启时返回 None"""
+    global _result_cache
+    settings = get_settings()
+    if not settings.result_cache_enabled:
+        return None
+    if _result_cache is None:
+        _result_cache = ResultCache(
+            max_entries=settings.result_cache_max_entries,
+            ttl_seconds=settings.result_cache_ttl_seconds,
+            disk_dir=settings.result_cache_dir,
+            disk_max_bytes=settings.result_cache_disk_max_mb * 1024 * 1024,
+        )
+    return _result_cache
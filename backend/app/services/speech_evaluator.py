@@ -0,0 +1,47 @@
+"""
+语音评估后端接口
+
+所有评估后端（本地 Whisper、阿里云等）实现同一接口，由 speech_router 统一调度。
+"""
+
+from abc import ABC, abstractmethod
+from typing import Dict
+
+
+class SpeechRequestError(ValueError):
+    """请求本身有问题（空音频、无效字母、无法解码等），换后端也不会成功"""
+
+
+class SpeechBackendError(RuntimeError):
+    """后端调用失败或返回了无法解析的结果，可以换下一个后端"""
+
+
+class SpeechEvaluator(ABC):
+    """语音评估后端"""
+
+    name: str = ""
+
+    @abstractmethod
+    async def evaluate(self, audio_data: bytes, letter: str) -> Dict:
+        """
+        评估语音
+
+        Returns:
+            包含 score / accuracy / feedback / audio_length / details 的字典
+
+        Raises:
+            SpeechRequestError: 请求本身有问题，调度器不再回退到其他后端
+            其他异常（SpeechBackendError、ExecutorBusyError 等）: 后端失败，可以换下一个后端
+        """
+
+    def load(self) -> float:
+        """当前负载，0 表示空闲，1 表示已满；远程后端默认视为空闲"""
+        return 0.0
+
+    @property
+    def cache_fingerprint(self) -> str:
+        """影响评估结果的配置，作为结果缓存键的一部分"""
+        return self.name
+
+    async def aclose(self) -> None:
+        """释放连接等资源，应用关闭时调用"""
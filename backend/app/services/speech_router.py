@@ -0,0 +1,207 @@
+"""
+多后端语音评估调度
+
+按配置把请求分给各评估后端：
+- 路由：按配置顺序，或按负载选择；首选后端负载过高时让给下一个
+- 对冲：首选后端超过延迟阈值仍未返回时，同时向下一个后端发请求，先成功者胜出
+- 回退：后端出错时依次尝试后面的后端
+"""
+
+import asyncio
+from typing import Any, Dict, List, Optional
+
+from app.config import get_settings
+from app.services.result_cache import get_result_cache
+from app.services.speech_evaluator import SpeechEvaluator, SpeechRequestError
+
+
+class SpeechBackendRouter:
+    """语音评估后端调度器"""
+
+    def __init__(
+        self,
+        backends: List[SpeechEvaluator],
+        routing: str = "config",
+        shed_threshold: float = 1.0,
+        hedge_after_ms: float = 0,
+    ):
+        if not backends:
+            raise ValueError("至少需要配置一个语音评估后端")
+        if routing not in ("config", "least_loaded"):
+            raise ValueError(f"未知的路由策略: {routing}")
+
+        self.backends = backends
+        self.routing = routing
+        self.shed_threshold = shed_threshold
+        self.hedge_after = hedge_after_ms / 1000 if hedge_after_ms > 0 else None
+
+        self._requests = {b.name: 0 for b in backends}
+        self._errors = {b.name: 0 for b in backends}
+        self._wins = {b.name: 0 for b in backends}
+        self._shed = 0
+        self._hedged = 0
+        self._fallbacks = 0
+
+    @property
+    def cache_fingerprint(self) -> str:
+        return ";".join(b.cache_fingerprint for b in self.backends)
+
+    def _order(self) -> List[SpeechEvaluator]:
+        """本次请求尝试后端的顺序"""
+        if self.routing == "least_loaded":
+            return sorted(self.backends, key=lambda b: b.load())
+
+        order = list(self.backends)
+        if len(order) > 1 and order[0].load() >= self.shed_threshold:
+            self._shed += 1
+            order.append(order.pop(0))
+        return order
+
+    async def _call(self, backend: SpeechEvaluator, audio_data: bytes, letter: str) -> Dict:
+        self._requests[backend.name] += 1
+        try:
+            result = await backend.evaluate(audio_data, letter)
+        except SpeechRequestError:
+            raise
+        except Exception as e:
+            self._errors[backend.name] += 1
+            print(f"语音评估后端 {backend.name} 失败: {e}")
+            raise
+        self._wins[backend.name] += 1
+        return result
+
+    async def _evaluate_hedged(self, primary: SpeechEvaluator, secondary: SpeechEvaluator, audio_data: bytes, letter: str) -> Dict:
+        first = asyncio.ensure_future(self._call(primary, audio_data, letter))
+        done, _ = await asyncio.wait({first}, timeout=self.hedge_after)
+        if done:
+            if first.exception() is None or isinstance(first.exception(), SpeechRequestError):
+                return first.result()
+            # 首选后端在对冲阈值前就失败了，直接回退
+            self._fallbacks += 1
+            try:
+                return await self._call(secondary, audio_data, letter)
+            except SpeechRequestError:
+                raise
+            except Exception:
+                raise first.exception()
+
+        self._hedged += 1
+        second = asyncio.ensure_future(self._call(secondary, audio_data, letter))
+        pending = {first, second}
+        errors = []
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                    if isinstance(task.exception(), SpeechRequestError):
+                        raise task.exception()
+                    errors.append(task.exception())
+        finally:
+            for task in pending:
+                task.cancel()
+        raise errors[0]
+
+    async def evaluate(self, audio_data: bytes, letter: str) -> Dict:
+        """
+        评估语音
+
+        所有后端都失败时抛出第一个后端的异常（例如推理队列满时的 ExecutorBusyError）
+        """
+        order = self._order()
+        first_error: Optional[Exception] = None
+
+        if self.hedge_after is not None and len(order) > 1:
+            try:
+                return await self._evaluate_hedged(order[0], order[1], audio_data, letter)
+            except SpeechRequestError:
+                raise
+            except Exception as e:
+                first_error = e
+                order = order[2:]
+
+        for backend in order:
+            if first_error is not None:
+                self._fallbacks += 1
+            try:
+                return await self._call(backend, audio_data, letter)
+            except SpeechRequestError:
+                raise
+            except Exception as e:
+                if first_error is None:
+                    first_error = e
+
+        raise first_error
+
+    async def aclose(self) -> None:
+        for backend in self.backends:
+            await backend.aclose()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "routing": self.routing,
+            "backends": {
+                b.name: {
+                    "load": round(b.load(), 3),
+                    "requests": self._requests[b.name],
+                    "errors": self._errors[b.name],
+                    "wins": self._wins[b.name],
+                }
+                for b in self.backends
+            },
+            "shed": self._shed,
+            "hedged": self._hedged,
+            "fallbacks": self._fallbacks,
+        }
+
+
+def _create_backend(name: str) -> SpeechEvaluator:
+    if name == "whisper":
+        from app.services.whisper_speech import get_speech_evaluator
+        return get_speech_evaluator()
+    if name == "aliyun":
+        from app.services.aliyun_speech import get_speech_evaluator
+        return get_speech_evaluator()
+    raise ValueError(f"未知的语音评估后端: {name}")
+
+
+# 全局实例
+_speech_router: Optional[SpeechBackendRouter] = None
+
+
+def get_speech_router() -> SpeechBackendRouter:
+    """获取语音评估调度器实例"""
+    global _speech_router
+    if _speech_router is None:
+        settings = get_settings()
+        names = [n.strip() for n in settings.speech_backends.split(",") if n.strip()]
+        _speech_router = SpeechBackendRouter(
+            [_create_backend(n) for n in names],
+            routing=settings.speech_routing,
+            shed_threshold=settings.speech_shed_threshold,
+            hedge_after_ms=settings.speech_hedge_ms,
+        )
+    return _speech_router
+
+
+async def close_speech_router() -> None:
+    """关闭各后端的连接（调度器未创建过则什么都不做）"""
+    if _speech_router is not None:
+        await _speech_router.aclose()
+
+
+async def evaluate_speech(audio_data: bytes, letter: str) -> Dict:
+    """
+    评估语音的主函数
+
+    经调度器选择后端；相同录音的重复提交直接返回缓存结果
+    """
+    router = get_speech_router()
+
+    cache = get_result_cache()
+    if cache is None:
+        return await router.evaluate(audio_data, letter)
+
+    key = cache.make_key(audio_data, letter.upper(), router.cache_fingerprint)
+    return await cache.get_or_compute(key, lambda: router.evaluate(audio_data, letter))
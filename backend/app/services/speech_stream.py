@@ -0,0 +1,188 @@
+"""
+流式语音评估
+
+孩子还在说话时音频就分块送达：边接收边做 VAD，每积累一段新语音给出一次中间结果，
+检测到说完立刻给出最终评分，松开录音按钮时结果往往已经算好。
+流式识别使用本地 Whisper（远程后端只接受完整录音）。
+"""
+
+import asyncio
+import copy
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.config import get_settings
+from app.services.audio_decode import (
+    SAMPLE_RATE,
+    AudioDecodeError,
+    ContainerStreamDecoder,
+    PcmStreamDecoder,
+)
+from app.services.audio_trim import StreamingVAD
+from app.services.whisper_speech import WhisperSpeechEvaluator
+
+# 原始 PCM 之外，支持 MediaRecorder 输出的容器分片
+CONTAINER_FORMATS = ("webm", "ogg", "mp4")
+
+
+class SpeechStream:
+    """一次流式评估会话"""
+
+    def __init__(
+        self,
+        evaluator: WhisperSpeechEvaluator,
+        letter: str,
+        audio_format: str = "pcm_s16le",
+        sample_rate: int = SAMPLE_RATE,
+        on_partial: Optional[Callable[[Dict], Awaitable[None]]] = None,
+    ):
+        """
+        Args:
+            evaluator: Whisper 评估器
+            letter: 目标字母（大写）
+            audio_format: pcm_s16le 或 webm / ogg / mp4
+            sample_rate: PCM 的采样率（容器格式忽略）
+            on_partial: 中间结果回调
+        """
+        settings = get_settings()
+        self.evaluator = evaluator
+        self.letter = letter
+        self.on_partial = on_partial
+
+        if audio_format == "pcm_s16le":
+            self.decoder = PcmStreamDecoder(sample_rate)
+        elif audio_format in CONTAINER_FORMATS:
+            self.decoder = ContainerStreamDecoder()
+        else:
+            raise AudioDecodeError(f"不支持的音频格式: {audio_format}")
+        # 容器格式每次都要整体重新解码，放到线程里
+        self._decode_in_thread = audio_format in CONTAINER_FORMATS
+
+        self.vad = StreamingVAD(
+            silence_floor_db=settings.audio_silence_floor_db,
+            end_silence_ms=settings.stream_end_silence_ms,
+        )
+        self.padding = settings.audio_trim_padding_ms * SAMPLE_RATE // 1000
+        self.max_samples = int(settings.audio_max_speech_seconds * SAMPLE_RATE)
+        self.partial_interval = settings.stream_partial_interval_ms * SAMPLE_RATE // 1000
+
+        self.bytes_received = 0
+        self._chunks: List[np.ndarray] = []
+        self._samples = 0
+        self._audio: Optional[np.ndarray] = None  # _chunks 拼接后的缓存
+
+        self._partial_task: Optional[asyncio.Task] = None
+        self._partial_segment_pending: Optional[Tuple[int, int]] = None
+        self._partial_segment: Optional[Tuple[int, int]] = None
+        self._partial_result: Optional[Dict] = None
+        self._last_partial_end = 0
+
+    @property
+    def speech_ended(self) -> bool:
+        """说完了（语音后静音够长，或语音已达最长时长）"""
+        if self.vad.ended:
+            return True
+        speech = self.vad.speech_range
+        return speech is not None and speech[1] - speech[0] >= self.max_samples
+
+    async def feed(self, data: bytes) -> None:
+        """送入一块音频"""
+        self.bytes_received += len(data)
+        if self._decode_in_thread:
+            samples = await self.evaluator.decode_executor.run(self.decoder.feed, data)
+        else:
+            samples = self.decoder.feed(data)
+        self._append(samples)
+        self._maybe_start_partial()
+
+    async def finish(self) -> Dict:
+        """输入结束，给出最终结果"""
+        self._append(self.decoder.flush())
+        segment = self._segment()
+
+        task = self._partial_task
+        if task is not None and not task.done():
+            if self._partial_segment_pending == segment:
+                # 正在算的中间结果就是最终音频，等它即可
+                await asyncio.wait({task})
+            else:
+                task.cancel()
+
+        if segment is not None and segment == self._partial_segment:
+            result = copy.deepcopy(self._partial_result)
+        else:
+            result = await self._evaluate(segment)
+
+        result["details"]["stream_duration"] = round(self._samples / SAMPLE_RATE, 2)
+        return result
+
+    def close(self) -> None:
+        if self._partial_task is not None:
+            self._partial_task.cancel()
+
+    def _append(self, samples: np.ndarray) -> None:
+        if len(samples) == 0:
+            return
+        self._chunks.append(samples)
+        self._samples += len(samples)
+        self._audio = None
+        self.vad.feed(samples)
+
+    def _segment(self) -> Optional[Tuple[int, int]]:
+        """待评估的区间：语音前后留余量，不超过最长时长；没有语音时为 None"""
+        speech = self.vad.speech_range
+        if speech is None:
+            return None
+        start = max(0, speech[0] - self.padding)
+        end = min(self._samples, speech[1] + self.padding, start + self.max_samples)
+        return start, end
+
+    async def _evaluate(self, segment: Optional[Tuple[int, int]]) -> Dict:
+        if segment is None:
+            return await self.evaluator.evaluate_audio(None, self.letter, self.bytes_received)
+
+        if self._audio is None:
+            self._audio = np.concatenate(self._chunks)
+            self._chunks = [self._audio]
+        audio = self._audio[segment[0]:segment[1]]
+        return await self.evaluator.evaluate_audio(audio, self.letter, self.bytes_received)
+
+    def _maybe_start_partial(self) -> None:
+        """
+        新语音积累够了且上一个中间结果已算完，就再算一个（不排队，算不过来就跳过）
+
+        语音后的余量收齐时区间不会再变，此时也算一次：等静音够长判定说完时，
+        最终结果多半已经算好，可以直接复用。
+        """
+        if self.on_partial is None or self.speech_ended:
+            return
+        if self._partial_task is not None and not self._partial_task.done():
+            return
+        segment = self._segment()
+        if segment is None or segment == self._partial_segment_pending:
+            return
+        settled = segment[1] < self._samples
+        if not settled and segment[1] - self._last_partial_end < self.partial_interval:
+            return
+
+        self._last_partial_end = segment[1]
+        self._partial_segment_pending = segment
+        self._partial_task = asyncio.create_task(self._run_partial(segment))
+
+    async def _run_partial(self, segment: Tuple[int, int]) -> None:
+        try:
+            result = await self._evaluate(segment)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            # 中间结果只是锦上添花，失败（如推理队列满）不影响最终评分
+            print(f"流式中间结果计算失败: {e}")
+            return
+
+        self._partial_segment = segment
+        self._partial_result = result
+        try:
+            await self.on_partial(copy.deepcopy(result))
+        except Exception:
+            pass  # 连接已断开
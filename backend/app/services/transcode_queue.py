@@ -0,0 +1,239 @@
+"""
+录音后台转码队列
+
+录音保存后把记录 ID 放入进程内队列，后台 worker 读出原始文件，转为单声道 Opus
+并做响度归一化（见 audio_transcode），存入录音存储后用比较并交换替换 file_path / file_url：
+只有记录仍指向转码前的文件时才替换，转码期间用户重录了也不会被旧录音覆盖。
+
+保存接口返回的是原文件地址，前端拿到后马上播放，而转码通常在这之前就完成了：
+替换后的原文件先保留 source_grace 秒再回收，原地址在此期间仍可播放。
+
+队列只在内存中：进程重启时还没转码的录音保持原格式，照常可以播放。
+"""
+
+import asyncio
+import hashlib
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set
+
+from sqlalchemy import select, update
+
+from app.config import get_settings
+from app.db.database import AsyncSessionLocal
+from app.models.models import Recording
+from app.services.audio_blobs import acquire_blob, discard_file, release_blob, release_file
+from app.services.audio_store import blob_key, get_audio_store, is_blob_key, legacy_audio_path
+from app.services.audio_transcode import TRANSCODE_CONTAINERS, transcode_to_opus
+from app.services.executor import BoundedExecutor
+from app.services.metrics import Histogram
+
+
+class TranscodeQueue:
+    """转码队列：固定数量的 worker 协程，转码本身在专用线程池中执行"""
+
+    def __init__(
+        self,
+        workers: int,
+        max_queue: int,
+        container: str,
+        bitrate: int,
+        loudness: float,
+        temp_dir: str,
+        source_grace: float = 0,
+    ):
+        if container not in TRANSCODE_CONTAINERS:
+            raise ValueError(f"不支持的转码容器: {container}")
+        self.container = container
+        self.bitrate = bitrate
+        self.loudness = loudness
+        self.temp_dir = Path(temp_dir)
+        self.source_grace = source_grace
+        # worker 协程数与线程数相同，线程池不需要额外排队
+        self.executor = BoundedExecutor("transcode", max_workers=workers, max_queue=0)
+        self._queue: "asyncio.Queue[int]" = asyncio.Queue(maxsize=max(1, max_queue))
+        self._workers: List[asyncio.Task] = []
+        # 等待宽限期结束后回收的原文件
+        self._pending_discards: Set[asyncio.Task] = set()
+
+        self._dropped = 0
+        self._transcoded = 0
+        self._skipped = 0
+        self._superseded = 0
+        self._failed = 0
+        self._bytes_in = 0
+        self._bytes_out = 0
+        self.transcode_ms = Histogram([25, 50, 100, 250, 500, 1000, 2500, 5000])
+
+    def start(self) -> None:
+        if not self._workers:
+            self._workers = [
+                asyncio.create_task(self._worker(), name=f"transcode-{i}")
+                for i in range(self.executor.max_workers)
+            ]
+
+    async def stop(self) -> None:
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        # 进程退出后没人再回收，宽限期未到的原文件现在就回收
+        pending = list(self._pending_discards)
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+        self.executor.shutdown()
+
+    def submit(self, recording_id: int) -> None:
+        """录音已保存（事务提交后调用）；队列满或未启动时放弃，录音保持原格式"""
+        if not self._workers:
+            self._dropped += 1
+            return
+        try:
+            self._queue.put_nowait(recording_id)
+        except asyncio.QueueFull:
+            self._dropped += 1
+
+    async def join(self) -> None:
+        """等待已排队的录音全部处理完"""
+        await self._queue.join()
+
+    async def _worker(self) -> None:
+        while True:
+            recording_id = await self._queue.get()
+            try:
+                await self.process(recording_id)
+            except Exception as e:
+                self._failed += 1
+                print(f"录音转码失败: recording={recording_id}: {e}")
+            finally:
+                self._queue.task_done()
+
+    async def _read(self, file_path: str) -> bytes:
+        if is_blob_key(file_path):
+            return await get_audio_store().get(file_path)
+        return await asyncio.to_thread(legacy_audio_path(file_path).read_bytes)
+
+    async def process(self, recording_id: int) -> None:
+        """转码一条录音并替换记录中的文件"""
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(select(Recording.file_path).where(Recording.id == recording_id))
+            source_path = result.scalar_one_or_none()
+        if not source_path:
+            self._superseded += 1  # 录音已被删除
+            return
+
+        data = await self._read(source_path)
+        started = time.perf_counter()
+        encoded = await self.executor.run(transcode_to_opus, data, self.container, self.bitrate, self.loudness)
+        self.transcode_ms.observe((time.perf_counter() - started) * 1000)
+        if len(encoded) >= len(data):
+            self._skipped += 1  # 原文件已经足够小（例如本身就是低码率 Opus）
+            return
+
+        digest = hashlib.sha256(encoded).hexdigest()
+        key = blob_key(digest, self.container)
+        file_url = f"/api/speech/audio/{digest}.{self.container}"
+
+        self.temp_dir.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.temp_dir / f".transcode-{uuid.uuid4().hex}.tmp"
+        try:
+            await asyncio.to_thread(tmp_path.write_bytes, encoded)
+            async with AsyncSessionLocal() as db:
+                await acquire_blob(db, get_audio_store(), key, len(encoded), tmp_path)
+                result = await db.execute(
+                    update(Recording)
+                    .where(Recording.id == recording_id, Recording.file_path == source_path)
+                    .values(file_path=key, file_url=file_url)
+                    .returning(Recording.id)
+                )
+                if result.scalar_one_or_none() is None:
+                    # 转码期间录音已被重录或删除：撤销对转码结果的引用
+                    swapped = False
+                    unreferenced = key if await release_blob(db, key) else None
+                else:
+                    swapped = True
+                    unreferenced = await release_file(db, source_path)
+                await db.commit()
+        finally:
+            await asyncio.to_thread(tmp_path.unlink, missing_ok=True)
+
+        if unreferenced is not None:
+            if swapped and self.source_grace > 0:
+                self._discard_later(unreferenced)
+            else:
+                await discard_file(unreferenced)
+        if swapped:
+            self._transcoded += 1
+            self._bytes_in += len(data)
+            self._bytes_out += len(encoded)
+        else:
+            self._superseded += 1
+
+    def _discard_later(self, file_path: str) -> None:
+        """宽限期结束后回收被替换的原文件"""
+        async def run() -> None:
+            try:
+                await asyncio.sleep(self.source_grace)
+            finally:
+                # 队列停止时 sleep 被取消，同样立即回收
+                await discard_file(file_path)
+
+        task = asyncio.create_task(run(), name=f"transcode-discard-{file_path}")
+        self._pending_discards.add(task)
+        task.add_done_callback(self._pending_discards.discard)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "container": self.container,
+            "bitrate": self.bitrate,
+            "queued": self._queue.qsize(),
+            "pending_discards": len(self._pending_discards),
+            "dropped": self._dropped,
+            "transcoded": self._transcoded,
+            "skipped_not_smaller": self._skipped,
+            "superseded": self._superseded,
+            "failed": self._failed,
+            "bytes_in": self._bytes_in,
+            "bytes_out": self._bytes_out,
+            "bytes_saved": self._bytes_in - self._bytes_out,
+            "transcode_ms": self.transcode_ms.snapshot(),
+        }
+
+
+# 全局实例
+_transcode_queue: Optional[TranscodeQueue] = None
+
+
+def get_transcode_queue() -> Optional[TranscodeQueue]:
+    """获取转码队列，未开启转码时返回 None"""
+    global _transcode_queue
+    settings = get_settings()
+    if not settings.audio_transcode_enabled:
+        return None
+    if _transcode_queue is None:
+        _transcode_queue = TranscodeQueue(
+            workers=settings.audio_transcode_workers,
+            max_queue=settings.audio_transcode_queue_size,
+            container=settings.audio_transcode_container,
+            bitrate=settings.audio_transcode_bitrate,
+            loudness=settings.audio_transcode_loudness,
+            temp_dir=settings.audio_store_dir,
+            source_grace=settings.audio_transcode_source_grace,
+        )
+    return _transcode_queue
+
+
+def submit_transcode(recording_id: int) -> None:
+    """录音已保存，排队转码（未开启转码时什么都不做）"""
+    queue = get_transcode_queue()
+    if queue is not None:
+        queue.submit(recording_id)
+
+
+async def close_transcode_queue() -> None:
+    global _transcode_queue
+    if _transcode_queue is not None:
+        await _transcode_queue.stop()
+        _transcode_queue = None
@@ -0,0 +1,96 @@
+"""
+登录用户缓存
+
+每个需要登录的请求都要把令牌解析成用户。令牌里带有用户 ID，
+短时间内重复出现的用户直接从进程内缓存取身份信息，不查数据库。
+缓存的是与会话无关的只读快照，不是 ORM 对象，可以安全地跨请求共享。
+"""
+
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, Optional, Tuple
+
+from app.config import get_settings
+
+
+@dataclass(frozen=True)
+class CachedUser:
+    """当前用户的身份信息（字段与 UserResponse 对应）"""
+
+    id: int
+    nickname: str
+    avatar: Optional[str]
+    created_at: datetime
+
+    @classmethod
+    def from_orm_user(cls, user) -> "CachedUser":
+        return cls(id=user.id, nickname=user.nickname, avatar=user.avatar, created_at=user.created_at)
+
+
+class UserCache:
+    """按用户 ID 缓存身份信息，带 TTL 和条数上限"""
+
+    def __init__(self, ttl_seconds: float, max_entries: int):
+        self.ttl = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[int, Tuple[float, CachedUser]]" = OrderedDict()
+        self._hits = 0
+        self._misses = 0
+        self._invalidations = 0
+
+    def get(self, user_id: int) -> Optional[CachedUser]:
+        entry = self._entries.get(user_id)
+        if entry is not None:
+            expires_at, user = entry
+            if expires_at > time.time():
+                self._entries.move_to_end(user_id)
+                self._hits += 1
+                return user
+            del self._entries[user_id]
+        self._misses += 1
+        return None
+
+    def set(self, user: CachedUser) -> None:
+        self._entries[user.id] = (time.time() + self.ttl, user)
+        self._entries.move_to_end(user.id)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, user_id: int) -> None:
+        """用户资料或密码变更后调用，下次请求重新从数据库加载"""
+        if self._entries.pop(user_id, None) is not None:
+            self._invalidations += 1
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self._hits + self._misses
+        return {
+            "entries": len(self._entries),
+            "hits": self._hits,
+            "misses": self._misses,
+            "invalidations": self._invalidations,
+            "hit_rate": round(self._hits / lookups, 3) if lookups else 0.0,
+        }
+
+
+# 全局实例
+_user_cache: Optional[UserCache] = None
+
+
+def get_user_cache() -> Optional[UserCache]:
+    """获取用户缓存实例，未开启时返回 None"""
+    global _user_cache
+    settings = get_settings()
+    if settings.user_cache_ttl_seconds <= 0:
+        return None
+    if _user_cache is None:
+        _user_cache = UserCache(settings.user_cache_ttl_seconds, settings.user_cache_max_entries)
+    return _user_cache
+
+
+def invalidate_user(user_id: int) -> None:
+    """使某个用户的缓存失效（缓存未开启时什么都不做）"""
+    cache = get_user_cache()
+    if cache is not None:
+        cache.invalidate(user_id)
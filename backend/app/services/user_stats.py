@@ -0,0 +1,123 @@
+"""
+用户学习统计汇总
+
+总星数、完成字母数、连续打卡天数保存在 user_stats 表中，
+统计接口只需按主键读一行，不必每次扫描全部打卡记录。
+
+并发一致性：修改进度或打卡前先调用 lock_user_stats 锁住该用户的汇总行，
+同一用户的写操作因此串行；之后的重新计算是新语句，能看到此前已提交的全部修改。
+"""
+
+from datetime import date
+from typing import Optional
+
+from sqlalchemy import TextClause, text
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.models import UserStats
+
+# 按打卡记录重新计算：连续天数为从最后打卡日往前的连续日期数
+_REBUILD_SQL = """
+WITH days AS (
+    SELECT DISTINCT user_id, checkins.date AS d
+    FROM checkins
+    {checkin_filter}
+),
+ranked AS (
+    SELECT user_id, d,
+           ROW_NUMBER() OVER (PARTITION BY user_id ORDER BY d DESC) AS rn,
+           MAX(d) OVER (PARTITION BY user_id) AS last_d
+    FROM days
+),
+streaks AS (
+    SELECT user_id, MAX(last_d) AS last_d,
+           COUNT(*) FILTER (WHERE d + CAST(rn - 1 AS INTEGER) = last_d) AS streak
+    FROM ranked
+    GROUP BY user_id
+),
+totals AS (
+    SELECT user_id,
+           COALESCE(SUM(score), 0) AS stars,
+           COUNT(*) FILTER (WHERE completed) AS completed
+    FROM progress
+    {progress_filter}
+    GROUP BY user_id
+)
+INSERT INTO user_stats (user_id, total_stars, completed_letters, current_streak, last_checkin_date, updated_at)
+SELECT u.id, COALESCE(t.stars, 0), COALESCE(t.completed, 0), COALESCE(s.streak, 0), s.last_d, now()
+FROM users u
+LEFT JOIN totals t ON t.user_id = u.id
+LEFT JOIN streaks s ON s.user_id = u.id
+{user_filter}
+ON CONFLICT (user_id) DO UPDATE SET
+    total_stars = EXCLUDED.total_stars,
+    completed_letters = EXCLUDED.completed_letters,
+    current_streak = EXCLUDED.current_streak,
+    last_checkin_date = EXCLUDED.last_checkin_date,
+    updated_at = EXCLUDED.updated_at
+"""
+
+
+async def lock_user_stats(db: AsyncSession, user_id: int) -> None:
+    """确保汇总行存在并加行锁，直到事务结束"""
+    stmt = insert(UserStats).values(user_id=user_id)
+    await db.execute(stmt.on_conflict_do_update(
+        index_elements=[UserStats.user_id],
+        set_={"user_id": stmt.excluded.user_id},
+    ))
+
+
+async def refresh_progress_stats(db: AsyncSession, user_id: int) -> None:
+    """按进度表重新计算总星数和完成字母数（每个用户最多26行）"""
+    await db.execute(
+        text("""
+            UPDATE user_stats SET
+                total_stars = (SELECT COALESCE(SUM(score), 0) FROM progress WHERE user_id = :user_id),
+                completed_letters = (SELECT COUNT(*) FROM progress WHERE user_id = :user_id AND completed),
+                updated_at = now()
+            WHERE user_id = :user_id
+        """),
+        {"user_id": user_id},
+    )
+
+
+async def record_checkin(db: AsyncSession, user_id: int, day: date) -> None:
+    """记一次打卡：同一天不变，紧接上次打卡日加一，否则从1重新开始"""
+    await db.execute(
+        text("""
+            UPDATE user_stats SET
+                current_streak = CASE
+                    WHEN last_checkin_date = CAST(:day AS DATE) THEN current_streak
+                    WHEN last_checkin_date = CAST(:day AS DATE) - 1 THEN current_streak + 1
+                    ELSE 1
+                END,
+                last_checkin_date = CAST(:day AS DATE),
+                updated_at = now()
+            WHERE user_id = :user_id
+              AND (last_checkin_date IS NULL OR last_checkin_date <= CAST(:day AS DATE))
+        """),
+        {"user_id": user_id, "day": day},
+    )
+
+
+def _rebuild_statement(user_id: Optional[int] = None) -> TextClause:
+    """重新计算汇总的语句，user_id 为 None 时覆盖所有用户"""
+    if user_id is None:
+        return text(_REBUILD_SQL.format(checkin_filter="", progress_filter="", user_filter=""))
+    sql = _REBUILD_SQL.format(
+        checkin_filter="WHERE user_id = :user_id",
+        progress_filter="WHERE user_id = :user_id",
+        user_filter="WHERE u.id = :user_id",
+    )
+    return text(sql).bindparams(user_id=user_id)
+
+
+async def rebuild_user_stats(db: AsyncSession, user_id: Optional[int] = None) -> None:
+    """
+    根据进度和打卡记录重新计算汇总
+
+    user_id 为 None 时重建所有用户（回填/修复用）；
+    补交的打卡可能早于最后打卡日，此时也需要整体重新计算连续天数。
+    """
+    await db.execute(_rebuild_statement(user_id))
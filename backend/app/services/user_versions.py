@@ -0,0 +1,131 @@
+"""
+用户数据版本号与条件请求（ETag）
+
+首页每次回到前台都会请求进度、统计和打卡记录，大多数时候数据并没有变。
+进程内为每个用户记一个版本号，进度或打卡写入后递增；读接口用版本号生成 ETag，
+客户端带 If-None-Match 且版本未变时直接返回 304，不查数据库也不序列化。
+
+版本号只在本进程内递增：多 worker 部署时其他 worker 上的写入不会改变本进程的版本号，
+此时需关闭 ETAG_ENABLED，或保证同一用户的请求总落在同一个 worker。
+"""
+
+import itertools
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from fastapi import Request, Response
+
+from app.config import get_settings
+
+# 浏览器可以缓存，但每次使用前都要带 If-None-Match 回来确认
+REVALIDATE_CACHE_CONTROL = "private, no-cache"
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """If-None-Match 是否包含该 ETag（弱比较）"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == opaque for tag in header.split(","))
+
+
+def not_modified_response(etag: str, cache_control: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": cache_control})
+
+
+class UserVersions:
+    """按用户 ID 记录数据版本号，带条数上限"""
+
+    def __init__(self, max_entries: int, replica_grace_seconds: float = 0.0):
+        self.max_entries = max_entries
+        self.replica_grace = replica_grace_seconds
+        self._epoch = uuid.uuid4().hex[:8]  # 进程重启后之前发出的 ETag 全部失效
+        self._counter = itertools.count(1)
+        # 被淘汰用户的最大版本号，没有记录的用户都按这个版本。
+        # 版本号全局递增，之后的写入一定得到更大的版本，不会与旧 ETag 撞上
+        self._floor = 0
+        self._versions: "OrderedDict[int, Tuple[int, float]]" = OrderedDict()
+        self._bumps = 0
+        self._not_modified = 0
+        self._skipped = 0
+
+    def bump(self, user_id: int) -> None:
+        """用户数据有写入（事务提交后调用）"""
+        self._versions[user_id] = (next(self._counter), time.monotonic())
+        self._versions.move_to_end(user_id)
+        self._bumps += 1
+        while len(self._versions) > self.max_entries:
+            _, (version, _) = self._versions.popitem(last=False)
+            self._floor = max(self._floor, version)
+
+    def etag(self, user_id: int, scope: str, *parts: Any) -> Optional[str]:
+        """
+        当前版本的 ETag，scope 区分不同接口，parts 为响应依赖的其他输入（如日期）
+
+        配置了只读从库时，写入后的一小段时间内从库可能还没同步到，
+        此时读到的旧数据不能打上新版本号，返回 None 不生成 ETag。
+        """
+        version, bumped_at = self._versions.get(user_id, (self._floor, 0.0))
+        if self.replica_grace and time.monotonic() - bumped_at < self.replica_grace:
+            self._skipped += 1
+            return None
+        tag = ".".join([self._epoch, str(user_id), str(version), scope, *map(str, parts)])
+        return f'W/"{tag}"'
+
+    def check(self, request: Request, response: Response, user_id: int, scope: str, *parts: Any) -> Optional[Response]:
+        """
+        给响应加上 ETag；客户端缓存仍有效时返回 304 响应，接口应直接返回它
+        """
+        etag = self.etag(user_id, scope, *parts)
+        if etag is None:
+            return None
+        if etag_matches(request, etag):
+            self._not_modified += 1
+            return not_modified_response(etag, REVALIDATE_CACHE_CONTROL)
+        response.headers["ETag"] = etag
+        response.headers["Cache-Control"] = REVALIDATE_CACHE_CONTROL
+        return None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "users": len(self._versions),
+            "bumps": self._bumps,
+            "not_modified": self._not_modified,
+            "skipped_replica_grace": self._skipped,
+        }
+
+
+# 全局实例
+_user_versions: Optional[UserVersions] = None
+
+
+def get_user_versions() -> Optional[UserVersions]:
+    """获取版本号实例，未开启 ETag 时返回 None"""
+    global _user_versions
+    settings = get_settings()
+    if not settings.etag_enabled:
+        return None
+    if _user_versions is None:
+        grace = settings.etag_replica_grace_seconds if settings.database_read_url else 0.0
+        _user_versions = UserVersions(settings.etag_max_users, grace)
+    return _user_versions
+
+
+def bump_user_version(user_id: int) -> None:
+    """用户进度/打卡有写入（未开启 ETag 时什么都不做）"""
+    versions = get_user_versions()
+    if versions is not None:
+        versions.bump(user_id)
+
+
+def check_not_modified(request: Request, response: Response, user_id: int, scope: str, *parts: Any) -> Optional[Response]:
+    """见 UserVersions.check；未开启 ETag 时总是返回 None"""
+    versions = get_user_versions()
+    if versions is None:
+        return None
+    return versions.check(request, response, user_id, scope, *parts)
@@ -4,72 +4,124 @@ Whisper 语音识别评分服务
 使用 faster-whisper 进行本地语音识别，基于置信度给出评分
 """
 
-import io
 import math
-import tempfile
-from typing import Optional, Dict, Tuple
-from pathlib import Path
+import threading
+from typing import Optional, Dict, List, Tuple
+
+import numpy as np
 
 from faster_whisper import WhisperModel
+from faster_whisper.audio import pad_or_trim
+from faster_whisper.tokenizer import Tokenizer
+from faster_whisper.transcribe import get_suppressed_tokens
 from app.config import get_settings
+from app.services.audio_decode import SAMPLE_RATE, decode_audio_bytes
+from app.services.audio_trim import trim_silence
+from app.services.batching import BatchScheduler
+from app.services.executor import BoundedExecutor
+from app.services.letter_classifier import LetterClassifier
+from app.services.letters import LETTER_WORD_MAP
+from app.services.speech_evaluator import SpeechBackendError, SpeechEvaluator, SpeechRequestError
+
+# 束搜索宽度（单条与批量识别共用）
+BEAM_SIZE = 5
 
-# 字母到单词的映射（与前端 learning.js 保持一致）
-LETTER_WORD_MAP = {
-    'A': 'Apple',
-    'B': 'Ball',
-    'C': 'Cat',
-    'D': 'Dog',
-    'E': 'Elephant',
-    'F': 'Fish',
-    'G': 'Grape',
-    'H': 'House',
-    'I': 'Ice cream',
-    'J': 'Juice',
-    'K': 'Kite',
-    'L': 'Lion',
-    'M': 'Moon',
-    'N': 'Nest',
-    'O': 'Orange',
-    'P': 'Panda',
-    'Q': 'Queen',
-    'R': 'Rainbow',
-    'S': 'Sun',
-    'T': 'Tiger',
-    'U': 'Umbrella',
-    'V': 'Violin',
-    'W': 'Watermelon',
-    'X': 'X-ray',
-    'Y': 'Yo-yo',
-    'Z': 'Zebra',
-}
-
-
-class WhisperSpeechEvaluator:
+
+class WhisperSpeechEvaluator(SpeechEvaluator):
     """Whisper 语音识别评估器"""
 
+    name = "whisper"
+
     def __init__(self):
         self.settings = get_settings()
         self.model_size = self.settings.whisper_model_size
         self.device = self.settings.whisper_device
         self.language = self.settings.whisper_language
-        
-        # 延迟加载模型（首次使用时加载）
+
+        # 推理线程池：Whisper 推理不在事件循环中执行
+        self.executor = BoundedExecutor(
+            "whisper",
+            max_workers=self.settings.whisper_workers,
+            max_queue=self.settings.whisper_queue_size,
+            timeout=self.settings.whisper_timeout_seconds,
+            retry_after=self.settings.whisper_retry_after_seconds,
+        )
+        # 解码线程池：解码和静音裁剪同样限制排队和时长，不占用推理线程
+        self.decode_executor = BoundedExecutor(
+            "audio-decode",
+            max_workers=self.settings.audio_decode_workers,
+            max_queue=self.settings.audio_decode_queue_size,
+            timeout=self.settings.audio_decode_timeout_seconds,
+            retry_after=self.settings.whisper_retry_after_seconds,
+        )
+
+        # 可选的微批调度：同一时间窗口内的请求合并成一次 Whisper 推理
+        self.batcher: Optional[BatchScheduler] = None
+        if self.settings.whisper_batch_enabled:
+            self.batcher = BatchScheduler(
+                "whisper-batch",
+                self._transcribe_batch,
+                self.executor,
+                max_batch_size=self.settings.whisper_batch_max_size,
+                max_wait_ms=self.settings.whisper_batch_max_wait_ms,
+            )
+
+        # 快速路径：先在 52 个已知目标上打分，不可信时才完整识别
+        self.fast_path = self.settings.whisper_fast_path
+        self.fast_path_min_prob = self.settings.whisper_fast_path_min_prob
+
+        # 延迟加载模型（首次使用时加载，或启动时通过 warmup() 预加载）
         self._model: Optional[WhisperModel] = None
+        self._tokenizer: Optional[Tokenizer] = None
+        self._classifier: Optional[LetterClassifier] = None
+        self._model_lock = threading.Lock()
+        self._warmed_up = False
 
     @property
     def model(self) -> WhisperModel:
         """获取 Whisper 模型实例（单例模式）"""
         if self._model is None:
-            try:
-                self._model = WhisperModel(
-                    self.model_size,
-                    device=self.device,
-                    compute_type="int8" if self.device == "cpu" else "float16"
-                )
-            except Exception as e:
-                raise RuntimeError(f"加载 Whisper 模型失败: {str(e)}")
+            # 多个推理线程可能同时首次访问，加锁避免重复加载
+            with self._model_lock:
+                if self._model is None:
+                    try:
+                        self._model = WhisperModel(
+                            self.model_size,
+                            device=self.device,
+                            compute_type="int8" if self.device == "cpu" else "float16",
+                            num_workers=self.settings.whisper_workers,
+                        )
+                    except Exception as e:
+                        raise RuntimeError(f"加载 Whisper 模型失败: {str(e)}")
         return self._model
 
+    def load(self) -> float:
+        """推理线程池占用率"""
+        return self.executor.pending / self.executor.capacity
+
+    @property
+    def cache_fingerprint(self) -> str:
+        """影响评估结果的配置，作为结果缓存键的一部分"""
+        s = self.settings
+        return "|".join(str(v) for v in (
+            "whisper", self.model_size, self.device, self.language, BEAM_SIZE,
+            self.fast_path, self.fast_path_min_prob,
+            s.audio_trim_enabled, s.audio_silence_floor_db, s.audio_trim_padding_ms, s.audio_max_speech_seconds,
+        ))
+
+    @property
+    def is_ready(self) -> bool:
+        """模型已加载并完成过一次推理"""
+        return self._model is not None and self._warmed_up
+
+    def warmup(self) -> None:
+        """
+        预热（阻塞调用）：加载模型并对一秒静音空跑一次识别，
+        让 CTranslate2 完成内存分配等首次初始化
+        """
+        self._transcribe(np.zeros(SAMPLE_RATE, dtype=np.float32), "A")
+        self._warmed_up = True
+
     def _normalize_text(self, text: str) -> str:
         """标准化文本：转小写、去除标点、去除空格"""
         import re
@@ -149,14 +201,333 @@ class WhisperSpeechEvaluator:
         
         return letter_match or word_match, 1.0  # 返回匹配结果和置信度
 
+    def _initial_prompt(self, letter: str) -> str:
+        """构建初始提示，帮助Whisper识别字母和单词"""
+        target_word = LETTER_WORD_MAP.get(letter, "")
+        return f"{letter}. {target_word}." if target_word else letter
+
+    def _prepare_audio(self, audio_data: bytes) -> Tuple[Optional[np.ndarray], Dict]:
+        """
+        解码并裁剪静音（阻塞调用）
+
+        Returns:
+            (待识别的音频，纯静音时为 None, 时长详情)
+        """
+        # 在内存中解码为 16kHz 单声道数组，不再落临时文件
+        audio = decode_audio_bytes(audio_data)
+        if not self.settings.audio_trim_enabled:
+            return audio, {}
+
+        trimmed = trim_silence(
+            audio,
+            silence_floor_db=self.settings.audio_silence_floor_db,
+            padding_ms=self.settings.audio_trim_padding_ms,
+            max_speech_seconds=self.settings.audio_max_speech_seconds,
+        )
+        details = {
+            "original_duration": round(trimmed.original_duration, 2),
+            "trimmed_duration": round(trimmed.trimmed_duration, 2),
+            "truncated": trimmed.truncated,
+        }
+        return (trimmed.audio if trimmed.has_speech else None), details
+
+    def _get_tokenizer(self) -> Tokenizer:
+        if self._tokenizer is None:
+            model = self.model
+            self._tokenizer = Tokenizer(
+                model.hf_tokenizer,
+                model.model.is_multilingual,
+                task="transcribe",
+                language=self.language,
+            )
+        return self._tokenizer
+
+    def _get_classifier(self) -> LetterClassifier:
+        if self._classifier is None:
+            self._classifier = LetterClassifier(self.model, self._get_tokenizer(), LETTER_WORD_MAP)
+        return self._classifier
+
+    def _transcribe(self, audio: np.ndarray, letter: str) -> Tuple[List[str], List[float], Dict]:
+        """
+        运行 Whisper 识别（阻塞调用，在推理线程池中执行）
+
+        Args:
+            audio: 16kHz 单声道 float32 音频
+
+        Returns:
+            (识别片段文本列表, 各片段平均对数概率列表, 附加详情)
+        """
+        if self.fast_path:
+            return self._run_batch([(audio, letter)])[0]
+
+        try:
+            # 使用 Whisper 进行识别
+            segments, info = self.model.transcribe(
+                audio,
+                language=self.language,
+                beam_size=BEAM_SIZE,
+                vad_filter=False,  # 禁用VAD，避免过滤掉短音频
+                condition_on_previous_text=False,  # 不依赖前文，更适合单字母/单词识别
+                initial_prompt=self._initial_prompt(letter),  # 提供初始提示，引导识别
+                temperature=0.0,  # 降低随机性，提高准确性
+            )
+
+            # 收集所有识别片段（segments 是惰性生成器，必须在工作线程内消费完）
+            recognized_texts = []
+            confidences = []
+
+            for segment in segments:
+                text = segment.text.strip()
+                if text:
+                    recognized_texts.append(text)
+                    confidences.append(segment.avg_logprob)  # 使用平均对数概率作为置信度
+
+            self._warmed_up = True
+            return recognized_texts, confidences, {}
+
+        except Exception as e:
+            print(f"Whisper 语音评估异常: {e}")
+            raise SpeechBackendError(f"语音识别失败: {str(e)}")
+
+    def _decode(self, encoder_output, letters: List[str]) -> List[Tuple[List[str], List[float]]]:
+        """对已编码的一批音频做完整束搜索解码"""
+        model = self.model
+        tokenizer = self._get_tokenizer()
+        prompts = [
+            model.get_prompt(
+                tokenizer,
+                previous_tokens=tokenizer.encode(" " + self._initial_prompt(letter)),
+                without_timestamps=True,
+            )
+            for letter in letters
+        ]
+        outputs = model.model.generate(
+            encoder_output,
+            prompts,
+            beam_size=BEAM_SIZE,
+            max_length=model.max_length,
+            return_scores=True,
+            return_no_speech_prob=True,
+            suppress_blank=True,
+            suppress_tokens=get_suppressed_tokens(tokenizer, [-1]),
+        )
+
+        results = []
+        for output in outputs:
+            tokens = [t for t in output.sequences_ids[0] if t < tokenizer.eot]
+            # 与 faster-whisper 相同的方式从得分还原平均对数概率
+            seq_len = len(output.sequences_ids[0])
+            avg_logprob = output.scores[0] * seq_len / (seq_len + 1)
+            text = tokenizer.decode(tokens).strip()
+
+            # 与 transcribe() 默认阈值一致：判定为静音的结果丢弃
+            if not text or (output.no_speech_prob > 0.6 and avg_logprob < -1.0):
+                results.append(([], []))
+            else:
+                results.append(([text], [avg_logprob]))
+        return results
+
+    def _transcribe_batch(self, items: List[Tuple[np.ndarray, str]]) -> List:
+        """
+        批量识别（阻塞调用，在推理线程池中执行）
+
+        整批失败时拆开逐条重试，一条有问题的录音不会连累同批其他用户的请求；
+        重试仍失败的条目在结果中放异常实例，由 BatchScheduler 只让对应请求失败。
+
+        Returns:
+            与 items 顺序一致的列表，每项是 (识别片段文本列表, 对数概率列表, 附加详情) 或异常实例
+        """
+        try:
+            return self._run_batch(items)
+        except Exception:
+            if len(items) == 1:
+                raise
+            print(f"Whisper 批量识别失败，逐条重试 {len(items)} 条")
+
+        results = []
+        for item in items:
+            try:
+                results.append(self._run_batch([item])[0])
+            except Exception as e:
+                results.append(e)
+        return results
+
+    def _run_batch(self, items: List[Tuple[np.ndarray, str]]) -> List[Tuple[List[str], List[float], Dict]]:
+        """
+        识别一批音频
+
+        所有音频的特征堆叠成一个 batch，编码只跑一次。
+        开启快速路径时先用字母分类器打分，只有没有可信候选时才做完整束搜索，
+        两者共用同一份编码结果。单条录音按一个 30 秒窗口处理（儿童录音远短于此）。
+        """
+        model = self.model
+        chunk_samples = model.feature_extractor.n_samples
+        features = [
+            pad_or_trim(model.feature_extractor(audio[:chunk_samples])[..., :-1])
+            for audio, _ in items
+        ]
+        letters = [letter for _, letter in items]
+
+        try:
+            encoder_output = model.encode(np.stack(features))
+
+            ranked = None
+            if self.fast_path:
+                ranked = self._get_classifier().rank(encoder_output, len(items))
+                confident = [r[0].probability >= self.fast_path_min_prob for r in ranked]
+            else:
+                confident = [False] * len(items)
+
+            decoded = None
+            if not all(confident):
+                decoded = self._decode(encoder_output, letters)
+        except Exception as e:
+            print(f"Whisper 批量识别异常: {e}")
+            raise SpeechBackendError(f"语音识别失败: {str(e)}")
+
+        self._warmed_up = True
+        results = []
+        for i in range(len(items)):
+            extra = {}
+            if ranked is not None:
+                extra = {
+                    "fast_path": confident[i],
+                    "candidates": [
+                        {"letter": c.letter, "text": c.text, "probability": round(c.probability, 3)}
+                        for c in ranked[i][:5]
+                    ],
+                }
+            if confident[i]:
+                best = ranked[i][0]
+                results.append(([best.text], [best.logprob], extra))
+            else:
+                texts, confidences = decoded[i]
+                results.append((texts, confidences, extra))
+        return results
+
+    def _score(self, letter: str, recognized_texts: List[str], confidences: List[float], audio_length: int) -> Dict:
+        """根据识别结果计算评分"""
+        # 合并识别结果
+        full_text = " ".join(recognized_texts).strip()
+
+        # 计算平均置信度（将对数概率转换为置信度）
+        if confidences:
+            # 对数概率通常在 -1 到 0 之间，转换为 0-1 的置信度
+            # 使用 exp 转换，然后归一化
+            avg_logprob = sum(confidences) / len(confidences)
+            # 将对数概率转换为置信度：exp(logprob) 然后归一化到 0-1
+            # 由于 logprob 通常是负数，我们使用 sigmoid 函数转换
+            # avg_logprob 通常在 -1 到 0 之间，我们将其映射到 0-1
+            confidence = 1 / (1 + math.exp(-avg_logprob * 2))  # 乘以2来调整范围
+        else:
+            confidence = 0.0
+            full_text = ""
+
+        # 检查是否匹配 - 对每个识别片段都进行检查
+        matched = False
+        for text in recognized_texts:
+            if text.strip():
+                segment_matched, _ = self._check_match(text.strip(), letter)
+                if segment_matched:
+                    matched = True
+                    break
+
+        # 如果单个片段不匹配，再检查完整文本
+        if not matched:
+            matched, _ = self._check_match(full_text, letter)
+
+        # 根据匹配结果和置信度计算评分
+        # 评分规则：
+        # 1. 完全匹配 → 3星
+        # 2. 不完全匹配（部分匹配） → 2星或1星
+        # 3. 没识别到 → 1星（鼓励分）
+
+        target_word = LETTER_WORD_MAP.get(letter, "")
+
+        # 检查是否完全匹配
+        is_exact_match = False
+        if matched:
+            recognized_lower = full_text.lower().strip()
+            target_letter_lower = letter.lower()
+            target_word_lower = target_word.lower() if target_word else ""
+
+            # 完全匹配：识别结果完全等于目标字母或单词（忽略大小写和标点）
+            recognized_clean = self._normalize_text(full_text)
+            target_letter_clean = self._normalize_text(target_letter_lower)
+            target_word_clean = self._normalize_text(target_word_lower) if target_word else ""
+
+            is_exact_match = (
+                recognized_clean == target_letter_clean or
+                recognized_clean == target_word_clean or
+                recognized_lower == target_letter_lower or
+                recognized_lower == target_word_lower
+            )
+
+        # 检查是否有部分匹配
+        partial_match = False
+        if not matched and target_word and full_text:
+            target_lower = target_word.lower()
+            recognized_lower = full_text.lower()
+            # 检查是否包含目标单词的前2-3个字符
+            if len(target_lower) >= 3:
+                prefix = target_lower[:2]  # 前2个字符
+                if prefix in recognized_lower:
+                    partial_match = True
+            # 检查是否包含目标字母
+            if letter.lower() in recognized_lower:
+                partial_match = True
+
+        # 根据匹配情况评分
+        if is_exact_match:
+            # 完全匹配 → 3星
+            stars = 3
+            feedback = f"太棒了！你的 {letter} 发音非常标准！"
+        elif matched or partial_match:
+            # 不完全匹配 → 根据置信度给2星或1星
+            if confidence >= 0.3:
+                stars = 2
+                feedback = f"很好！识别到了 {letter}，继续加油！"
+            else:
+                stars = 1
+                feedback = f"识别到了部分内容，再试试完整地说出 {letter} 或 {target_word} 吧！"
+        else:
+            # 没识别到 → 1星（鼓励分）
+            stars = 1
+            if full_text:
+                feedback = f"识别到: \"{full_text}\"，但未识别到 {letter}，再试试吧！"
+            else:
+                feedback = f"未识别到语音，请大声读出字母 {letter}！"
+
+        # 计算准确度百分比（基于置信度）
+        accuracy = round(confidence * 100, 1) if matched else 0.0
+
+        return {
+            "score": stars,
+            "accuracy": accuracy,
+            "feedback": feedback,
+            "audio_length": audio_length,
+            "details": {
+                "recognized_text": full_text,
+                "confidence": round(confidence, 3),
+                "matched": matched,
+                "target_letter": letter,
+                "target_word": LETTER_WORD_MAP.get(letter, ""),
+            }
+        }
+
     async def evaluate(self, audio_data: bytes, letter: str) -> Dict:
         """
         评估语音
-        
+
+        录音先裁掉首尾静音，纯静音录音直接给出结果，不经过模型；
+        解码在解码线程池、识别在推理线程池中执行（开启微批时与同时到达的请求合并处理），不阻塞事件循环；
+        任一线程池排队已满或超时会抛出 ExecutorBusyError / ExecutorTimeoutError，
+        音频无法解码时抛出 AudioDecodeError。
+
         Args:
             audio_data: 音频数据 (支持多种格式)
             letter: 目标字母 (A-Z)
-        
+
         Returns:
             评估结果字典，包含:
             - score: 星星数 (0-3)
@@ -166,163 +537,39 @@ class WhisperSpeechEvaluator:
             - details: 详细信息
         """
         if not audio_data or not letter:
-            raise ValueError("音频数据和字母不能为空")
-        
+            raise SpeechRequestError("音频数据和字母不能为空")
+
         letter = letter.upper()
         if letter not in LETTER_WORD_MAP:
-            raise ValueError(f"无效的字母: {letter}")
-        
-        try:
-            # 将音频数据保存到临时文件
-            with tempfile.NamedTemporaryFile(delete=False, suffix='.webm') as tmp_file:
-                tmp_file.write(audio_data)
-                tmp_path = tmp_file.name
-            
-            try:
-                # 使用 Whisper 进行识别
-                # 构建初始提示，帮助Whisper识别字母和单词
-                target_word = LETTER_WORD_MAP.get(letter, "")
-                initial_prompt = f"{letter}. {target_word}." if target_word else letter
-                
-                segments, info = self.model.transcribe(
-                    tmp_path,
-                    language=self.language,
-                    beam_size=5,
-                    vad_filter=False,  # 禁用VAD，避免过滤掉短音频
-                    condition_on_previous_text=False,  # 不依赖前文，更适合单字母/单词识别
-                    initial_prompt=initial_prompt,  # 提供初始提示，引导识别
-                    temperature=0.0,  # 降低随机性，提高准确性
-                )
-                
-                # 收集所有识别片段
-                recognized_texts = []
-                confidences = []
-                
-                for segment in segments:
-                    text = segment.text.strip()
-                    if text:
-                        recognized_texts.append(text)
-                        confidences.append(segment.avg_logprob)  # 使用平均对数概率作为置信度
-                
-                # 合并识别结果
-                full_text = " ".join(recognized_texts).strip()
-                
-                # 计算平均置信度（将对数概率转换为置信度）
-                if confidences:
-                    # 对数概率通常在 -1 到 0 之间，转换为 0-1 的置信度
-                    # 使用 exp 转换，然后归一化
-                    avg_logprob = sum(confidences) / len(confidences)
-                    # 将对数概率转换为置信度：exp(logprob) 然后归一化到 0-1
-                    # 由于 logprob 通常是负数，我们使用 sigmoid 函数转换
-                    # avg_logprob 通常在 -1 到 0 之间，我们将其映射到 0-1
-                    confidence = 1 / (1 + math.exp(-avg_logprob * 2))  # 乘以2来调整范围
-                else:
-                    confidence = 0.0
-                    full_text = ""
-                
-                # 检查是否匹配 - 对每个识别片段都进行检查
-                matched = False
-                for text in recognized_texts:
-                    if text.strip():
-                        segment_matched, _ = self._check_match(text.strip(), letter)
-                        if segment_matched:
-                            matched = True
-                            break
-                
-                # 如果单个片段不匹配，再检查完整文本
-                if not matched:
-                    matched, _ = self._check_match(full_text, letter)
-                
-                # 根据匹配结果和置信度计算评分
-                # 评分规则：
-                # 1. 完全匹配 → 3星
-                # 2. 不完全匹配（部分匹配） → 2星或1星
-                # 3. 没识别到 → 1星（鼓励分）
-                
-                target_word = LETTER_WORD_MAP.get(letter, "")
-                
-                # 检查是否完全匹配
-                is_exact_match = False
-                if matched:
-                    recognized_lower = full_text.lower().strip()
-                    target_letter_lower = letter.lower()
-                    target_word_lower = target_word.lower() if target_word else ""
-                    
-                    # 完全匹配：识别结果完全等于目标字母或单词（忽略大小写和标点）
-                    recognized_clean = self._normalize_text(full_text)
-                    target_letter_clean = self._normalize_text(target_letter_lower)
-                    target_word_clean = self._normalize_text(target_word_lower) if target_word else ""
-                    
-                    is_exact_match = (
-                        recognized_clean == target_letter_clean or
-                        recognized_clean == target_word_clean or
-                        recognized_lower == target_letter_lower or
-                        recognized_lower == target_word_lower
-                    )
-                
-                # 检查是否有部分匹配
-                partial_match = False
-                if not matched and target_word and full_text:
-                    target_lower = target_word.lower()
-                    recognized_lower = full_text.lower()
-                    # 检查是否包含目标单词的前2-3个字符
-                    if len(target_lower) >= 3:
-                        prefix = target_lower[:2]  # 前2个字符
-                        if prefix in recognized_lower:
-                            partial_match = True
-                    # 检查是否包含目标字母
-                    if letter.lower() in recognized_lower:
-                        partial_match = True
-                
-                # 根据匹配情况评分
-                if is_exact_match:
-                    # 完全匹配 → 3星
-                    stars = 3
-                    feedback = f"太棒了！你的 {letter} 发音非常标准！"
-                elif matched or partial_match:
-                    # 不完全匹配 → 根据置信度给2星或1星
-                    if confidence >= 0.3:
-                        stars = 2
-                        feedback = f"很好！识别到了 {letter}，继续加油！"
-                    else:
-                        stars = 1
-                        feedback = f"识别到了部分内容，再试试完整地说出 {letter} 或 {target_word} 吧！"
-                else:
-                    # 没识别到 → 1星（鼓励分）
-                    stars = 1
-                    if full_text:
-                        feedback = f"识别到: \"{full_text}\"，但未识别到 {letter}，再试试吧！"
-                    else:
-                        feedback = f"未识别到语音，请大声读出字母 {letter}！"
-                
-                # 计算准确度百分比（基于置信度）
-                accuracy = round(confidence * 100, 1) if matched else 0.0
-                
-                result = {
-                    "score": stars,
-                    "accuracy": accuracy,
-                    "feedback": feedback,
-                    "audio_length": len(audio_data),
-                    "details": {
-                        "recognized_text": full_text,
-                        "confidence": round(confidence, 3),
-                        "matched": matched,
-                        "target_letter": letter,
-                        "target_word": LETTER_WORD_MAP.get(letter, ""),
-                    }
-                }
-                return result
-            
-            finally:
-                # 清理临时文件
-                try:
-                    Path(tmp_path).unlink()
-                except Exception:
-                    pass
-        
-        except Exception as e:
-            print(f"Whisper 语音评估异常: {e}")
-            raise RuntimeError(f"语音识别失败: {str(e)}")
+            raise SpeechRequestError(f"无效的字母: {letter}")
+
+        audio, trim_details = await self.decode_executor.run(self._prepare_audio, audio_data)
+
+        result = await self.evaluate_audio(audio, letter, len(audio_data))
+        result["details"].update(trim_details)
+        return result
+
+    async def evaluate_audio(self, audio: Optional[np.ndarray], letter: str, audio_length: int) -> Dict:
+        """
+        评估已解码、已裁剪的音频（流式识别直接传入 PCM，省去解码）
+
+        Args:
+            audio: 16kHz 单声道 float32 音频，None 表示纯静音
+            letter: 目标字母（大写）
+            audio_length: 原始音频字节数，用于结果中的 audio_length
+        """
+        # 纯静音录音不必经过模型
+        if audio is None:
+            return self._score(letter, [], [], audio_length)
+
+        if self.batcher is not None:
+            recognized_texts, confidences, extra = await self.batcher.submit((audio, letter))
+        else:
+            recognized_texts, confidences, extra = await self.executor.run(self._transcribe, audio, letter)
+
+        result = self._score(letter, recognized_texts, confidences, audio_length)
+        result["details"].update(extra)
+        return result
 
 
 # 全局实例
@@ -349,4 +596,3 @@ async def evaluate_speech(audio_data: bytes, letter: str) -> Dict:
         raise ValueError("Whisper 语音识别服务未正确初始化")
     
     return await evaluator.evaluate(audio_data, letter)
-
@@ -0,0 +1,53 @@
+"""
+本地模拟阿里云语音评测接口，用于在没有阿里云账号时测试多后端调度
+
+用法：
+    python fake_aliyun_server.py [端口] [延迟毫秒] [失败率]
+
+然后在 .env 中配置：
+    SPEECH_BACKENDS=whisper,aliyun
+    ALIYUN_API_URL=http://127.0.0.1:8765/stream/v1/asr
+    ALIYUN_TOKEN=fake
+    ALIYUN_ACCESS_KEY_ID / ALIYUN_ACCESS_KEY_SECRET / ALIYUN_APP_KEY 填任意值
+"""
+
+import json
+import random
+import sys
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+PORT = int(sys.argv[1]) if len(sys.argv) > 1 else 8765
+DELAY_MS = float(sys.argv[2]) if len(sys.argv) > 2 else 0
+FAILURE_RATE = float(sys.argv[3]) if len(sys.argv) > 3 else 0
+
+
+class FakeAliyunHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        self.rfile.read(length)
+
+        if DELAY_MS:
+            time.sleep(DELAY_MS / 1000)
+
+        if random.random() < FAILURE_RATE:
+            self.send_response(500)
+            self.end_headers()
+            self.wfile.write(b"fake failure")
+            return
+
+        body = json.dumps({
+            "status": 20000000,
+            "message": "SUCCESS",
+            "result": {"overall": round(random.uniform(70, 95), 1)},
+        }).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+if __name__ == "__main__":
+    print(f"模拟阿里云评测服务: http://127.0.0.1:{PORT}/stream/v1/asr（延迟 {DELAY_MS}ms，失败率 {FAILURE_RATE}）")
+    ThreadingHTTPServer(("127.0.0.1", PORT), FakeAliyunHandler).serve_forever()
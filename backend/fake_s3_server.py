@@ -0,0 +1,102 @@
+"""
+本地模拟 S3 兼容对象存储，用于在没有对象存储时测试录音的 s3 存储后端
+
+只实现录音存储用到的 PUT / GET（含 Range）/ HEAD / DELETE，不校验签名。
+
+用法：
+    python fake_s3_server.py [端口] [数据目录]
+
+然后在 .env 中配置：
+    AUDIO_STORE=s3
+    S3_ENDPOINT_URL=http://127.0.0.1:9000
+    S3_BUCKET=recordings
+    S3_ACCESS_KEY_ID / S3_SECRET_ACCESS_KEY 填任意值
+"""
+
+import re
+import sys
+import tempfile
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import unquote
+
+PORT = int(sys.argv[1]) if len(sys.argv) > 1 else 9000
+DATA_DIR = Path(sys.argv[2]) if len(sys.argv) > 2 else Path(tempfile.mkdtemp(prefix="fake-s3-"))
+
+RANGE_RE = re.compile(r"bytes=(\d*)-(\d*)")
+
+
+class FakeS3Handler(BaseHTTPRequestHandler):
+    def _object_path(self):
+        path = unquote(self.path.split("?", 1)[0]).lstrip("/")
+        if not path or ".." in path.split("/") or "/" not in path:
+            return None
+        return DATA_DIR / path
+
+    def _send_empty(self, status, headers=None):
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def do_PUT(self):
+        path = self._object_path()
+        if path is None:
+            self._send_empty(400)
+            return
+        length = int(self.headers.get("Content-Length", 0))
+        data = self.rfile.read(length)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(data)
+        self._send_empty(200)
+
+    def do_DELETE(self):
+        path = self._object_path()
+        if path is not None:
+            path.unlink(missing_ok=True)
+        self._send_empty(204)
+
+    def do_HEAD(self):
+        self._get(send_body=False)
+
+    def do_GET(self):
+        self._get(send_body=True)
+
+    def _get(self, send_body):
+        path = self._object_path()
+        if path is None or not path.is_file():
+            self._send_empty(404)
+            return
+        data = path.read_bytes()
+        size = len(data)
+        status = 200
+        headers = {"Accept-Ranges": "bytes", "Content-Type": "application/octet-stream"}
+
+        match = RANGE_RE.fullmatch(self.headers.get("Range", "").strip())
+        if match and (match.group(1) or match.group(2)):
+            if match.group(1):
+                start = int(match.group(1))
+                end = min(int(match.group(2)), size - 1) if match.group(2) else size - 1
+            else:
+                start = max(size - int(match.group(2)), 0)
+                end = size - 1
+            if start >= size or start > end:
+                self._send_empty(416, {"Content-Range": f"bytes */{size}"})
+                return
+            data = data[start:end + 1]
+            status = 206
+            headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        if send_body:
+            self.wfile.write(data)
+
+
+if __name__ == "__main__":
+    print(f"模拟 S3 对象存储: http://127.0.0.1:{PORT}（数据目录 {DATA_DIR}）")
+    ThreadingHTTPServer(("127.0.0.1", PORT), FakeS3Handler).serve_forever()
@@ -4,7 +4,7 @@
 
 功能：
 1. 创建kids_english数据库（如果不存在）
-2. 创建所有数据表
+2. 执行数据库迁移，创建/升级所有数据表
 3. 验证数据库连接
 
 使用方法：
@@ -18,11 +18,11 @@ from pathlib import Path
 # 添加项目根目录到Python路径
 sys.path.insert(0, str(Path(__file__).parent))
 
+from alembic import command
 from sqlalchemy import create_engine, text
 import psycopg2
 from psycopg2.extensions import ISOLATION_LEVEL_AUTOCOMMIT
-from app.db.database import Base
-from app.models.models import User, Progress, Checkin, Achievement
+from app.db.migrate import alembic_config
 from app.config import get_settings
 
 
@@ -79,18 +79,19 @@ def create_tables():
     """创建所有数据表"""
     settings = get_settings()
 
-    print("\n正在创建数据表...")
+    print("\n正在执行数据库迁移...")
     engine = create_engine(_as_sync_url(settings.database_url))
 
-    # 创建所有表
-    Base.metadata.create_all(bind=engine)
+    # 创建所有表（已有的表升级到最新结构）
+    command.upgrade(alembic_config(), "head")
 
     print("✅ 数据表创建成功")
 
     # 验证表
     with engine.connect() as conn:
         tables = [
-            'users', 'progress', 'checkins', 'achievements'
+            'users', 'progress', 'checkins', 'achievements',
+            'recordings', 'sync_receipts', 'user_stats'
         ]
 
         print("\n验证数据表:")
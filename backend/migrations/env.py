@@ -0,0 +1,51 @@
+"""
+alembic 迁移环境
+
+数据库地址取自应用配置（.env 中的 DATABASE_URL），与应用使用同一个 asyncpg 驱动。
+应用启动时自动迁移会把已打开的连接放在 config.attributes["connection"] 中传进来。
+"""
+
+import asyncio
+from logging.config import fileConfig
+
+from alembic import context
+from sqlalchemy import pool, text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.config import get_settings
+from app.db.database import Base
+import app.models.models  # noqa: F401  注册全部模型，供 --autogenerate 比对
+
+config = context.config
+target_metadata = Base.metadata
+
+# 多个 worker 同时启动时只允许一个执行迁移，其余等待后发现已是最新版本
+MIGRATION_LOCK_ID = 2024052001
+
+
+def do_run_migrations(connection) -> None:
+    context.configure(connection=connection, target_metadata=target_metadata)
+    with context.begin_transaction():
+        if connection.dialect.name == "postgresql":
+            connection.execute(text("SELECT pg_advisory_xact_lock(:id)"), {"id": MIGRATION_LOCK_ID})
+        context.run_migrations()
+
+
+async def run_async_migrations() -> None:
+    engine = create_async_engine(get_settings().database_url, poolclass=pool.NullPool)
+    async with engine.connect() as connection:
+        await connection.run_sync(do_run_migrations)
+    await engine.dispose()
+
+
+if context.is_offline_mode():
+    raise RuntimeError("迁移需要连接数据库检查现有表结构，不支持 --sql 离线模式")
+
+connection = config.attributes.get("connection")
+if connection is None:
+    # 命令行执行 alembic upgrade head
+    if config.config_file_name is not None:
+        fileConfig(config.config_file_name)
+    asyncio.run(run_async_migrations())
+else:
+    do_run_migrations(connection)
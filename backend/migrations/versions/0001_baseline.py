@@ -0,0 +1,95 @@
+"""初始表结构
+
+引入迁移之前由 create_all 建出的表，已存在的表跳过，
+因此新库和老库都可以直接 alembic upgrade head。
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-17 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0001"
+down_revision: Union[str, Sequence[str], None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """升级"""
+    existing = set(sa.inspect(op.get_bind()).get_table_names())
+
+    if "users" not in existing:
+        op.create_table(
+            "users",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("nickname", sa.String(50)),
+            sa.Column("avatar", sa.String(200), nullable=True),
+            sa.Column("hashed_password", sa.String(100)),
+            sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        )
+        op.create_index("ix_users_id", "users", ["id"])
+        op.create_index("ix_users_nickname", "users", ["nickname"], unique=True)
+
+    if "progress" not in existing:
+        op.create_table(
+            "progress",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id")),
+            sa.Column("letter_id", sa.Integer()),
+            sa.Column("stage", sa.Integer()),
+            sa.Column("score", sa.Integer()),
+            sa.Column("completed", sa.Boolean()),
+            sa.Column("updated_at", sa.DateTime(timezone=True)),
+        )
+        op.create_index("ix_progress_id", "progress", ["id"])
+        op.create_index("ix_progress_letter_id", "progress", ["letter_id"])
+
+    if "checkins" not in existing:
+        op.create_table(
+            "checkins",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id")),
+            sa.Column("date", sa.String(10)),
+            sa.Column("letters_learned", sa.Integer()),
+            sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        )
+        op.create_index("ix_checkins_id", "checkins", ["id"])
+        op.create_index("ix_checkins_date", "checkins", ["date"])
+
+    if "achievements" not in existing:
+        op.create_table(
+            "achievements",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id")),
+            sa.Column("badge_type", sa.String(50)),
+            sa.Column("unlocked_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        )
+        op.create_index("ix_achievements_id", "achievements", ["id"])
+
+    if "recordings" not in existing:
+        op.create_table(
+            "recordings",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id")),
+            sa.Column("letter_id", sa.Integer()),
+            sa.Column("letter", sa.String(1)),
+            sa.Column("file_path", sa.String(500)),
+            sa.Column("file_url", sa.String(500)),
+            sa.Column("score", sa.Integer()),
+            sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        )
+        op.create_index("ix_recordings_id", "recordings", ["id"])
+        op.create_index("ix_recordings_letter_id", "recordings", ["letter_id"])
+
+
+def downgrade() -> None:
+    """回退"""
+    for table in ("recordings", "achievements", "checkins", "progress", "users"):
+        op.drop_table(table)
@@ -0,0 +1,173 @@
+"""按用户访问的唯一约束与组合索引
+
+热点查询都先按 user_id 过滤，原来只有 letter_id / date 的单列索引，user_id 没有索引：
+- progress：(user_id, letter_id) 唯一，进度 upsert 与按用户查询都走它
+- checkins：date 改为 DATE 类型，(user_id, date) 唯一，打卡 upsert 与按用户倒序查询都走它
+- recordings：(user_id, letter_id) 组合索引
+- 去掉不再使用的单列索引；补建批量同步和统计汇总用到的表
+
+建唯一约束前先合并历史重复行。每一步都先检查现状，
+由 create_all 建出的、部分已是新结构的库也可以直接升级。
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17 00:00:01
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0002"
+down_revision: Union[str, Sequence[str], None] = "0001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _index_names(table: str):
+    return {i["name"] for i in sa.inspect(op.get_bind()).get_indexes(table)}
+
+
+def _unique_names(table: str):
+    return {u["name"] for u in sa.inspect(op.get_bind()).get_unique_constraints(table)}
+
+
+def _drop_index_if_exists(name: str, table: str) -> None:
+    if name in _index_names(table):
+        op.drop_index(name, table_name=table)
+
+
+# 按已有进度和打卡记录计算每个用户的汇总（连续打卡天数从最后打卡日往前数）。
+# 写在迁移里而不是引用应用代码，之后修改汇总逻辑不会改变已执行过的迁移
+BACKFILL_USER_STATS_SQL = """
+WITH days AS (
+    SELECT DISTINCT user_id, checkins.date AS d
+    FROM checkins
+),
+ranked AS (
+    SELECT user_id, d,
+           ROW_NUMBER() OVER (PARTITION BY user_id ORDER BY d DESC) AS rn,
+           MAX(d) OVER (PARTITION BY user_id) AS last_d
+    FROM days
+),
+streaks AS (
+    SELECT user_id, MAX(last_d) AS last_d,
+           COUNT(*) FILTER (WHERE d + CAST(rn - 1 AS INTEGER) = last_d) AS streak
+    FROM ranked
+    GROUP BY user_id
+),
+totals AS (
+    SELECT user_id,
+           COALESCE(SUM(score), 0) AS stars,
+           COUNT(*) FILTER (WHERE completed) AS completed
+    FROM progress
+    GROUP BY user_id
+)
+INSERT INTO user_stats (user_id, total_stars, completed_letters, current_streak, last_checkin_date, updated_at)
+SELECT u.id, COALESCE(t.stars, 0), COALESCE(t.completed, 0), COALESCE(s.streak, 0), s.last_d, now()
+FROM users u
+LEFT JOIN totals t ON t.user_id = u.id
+LEFT JOIN streaks s ON s.user_id = u.id
+"""
+
+def upgrade() -> None:
+    """升级"""
+    bind = op.get_bind()
+    tables = set(sa.inspect(bind).get_table_names())
+
+    # progress：同一用户同一字母的重复行合并到最早的一行（取较大值）
+    if "uq_progress_user_letter" not in _unique_names("progress"):
+        op.execute("""
+            UPDATE progress p SET stage = m.stage, score = m.score, completed = m.completed
+            FROM (
+                SELECT MIN(id) AS keep_id, MAX(stage) AS stage, MAX(score) AS score,
+                       BOOL_OR(completed) AS completed
+                FROM progress
+                GROUP BY user_id, letter_id
+                HAVING COUNT(*) > 1
+            ) m
+            WHERE p.id = m.keep_id
+        """)
+        op.execute("""
+            DELETE FROM progress p USING progress keep
+            WHERE keep.user_id = p.user_id AND keep.letter_id = p.letter_id AND keep.id < p.id
+        """)
+        op.create_unique_constraint("uq_progress_user_letter", "progress", ["user_id", "letter_id"])
+    _drop_index_if_exists("ix_progress_letter_id", "progress")
+
+    # checkins：YYYY-MM-DD 字符串转为 DATE，同一天的重复行把学习字母数加到最早的一行
+    date_column = next(c for c in sa.inspect(bind).get_columns("checkins") if c["name"] == "date")
+    if not isinstance(date_column["type"], sa.Date):
+        op.execute("DELETE FROM checkins WHERE date IS NULL OR date = ''")
+        op.alter_column(
+            "checkins", "date",
+            type_=sa.Date(), nullable=False, postgresql_using="date::date",
+        )
+    if "uq_checkin_user_date" not in _unique_names("checkins"):
+        op.execute("""
+            UPDATE checkins c SET letters_learned = m.letters_learned
+            FROM (
+                SELECT MIN(id) AS keep_id, SUM(COALESCE(letters_learned, 0)) AS letters_learned
+                FROM checkins
+                GROUP BY user_id, date
+                HAVING COUNT(*) > 1
+            ) m
+            WHERE c.id = m.keep_id
+        """)
+        op.execute("""
+            DELETE FROM checkins c USING checkins keep
+            WHERE keep.user_id = c.user_id AND keep.date = c.date AND keep.id < c.id
+        """)
+        op.create_unique_constraint("uq_checkin_user_date", "checkins", ["user_id", "date"])
+    _drop_index_if_exists("ix_checkins_date", "checkins")
+
+    # recordings：每个用户每个字母一条，但历史数据可能有重复，只建普通索引
+    if "ix_recordings_user_letter" not in _index_names("recordings"):
+        op.create_index("ix_recordings_user_letter", "recordings", ["user_id", "letter_id"])
+    _drop_index_if_exists("ix_recordings_letter_id", "recordings")
+
+    if "sync_receipts" not in tables:
+        op.create_table(
+            "sync_receipts",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id")),
+            sa.Column("idempotency_key", sa.String(64)),
+            sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+            sa.UniqueConstraint("user_id", "idempotency_key", name="uq_sync_receipt_user_key"),
+        )
+        op.create_index("ix_sync_receipts_id", "sync_receipts", ["id"])
+
+    if "user_stats" not in tables:
+        op.create_table(
+            "user_stats",
+            sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), primary_key=True),
+            sa.Column("total_stars", sa.Integer(), server_default="0", nullable=False),
+            sa.Column("completed_letters", sa.Integer(), server_default="0", nullable=False),
+            sa.Column("current_streak", sa.Integer(), server_default="0", nullable=False),
+            sa.Column("last_checkin_date", sa.Date(), nullable=True),
+            sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        )
+        # 新建的汇总表按已有进度和打卡记录回填
+        op.execute(BACKFILL_USER_STATS_SQL)
+
+
+def downgrade() -> None:
+    """回退"""
+    op.drop_table("user_stats")
+    op.drop_table("sync_receipts")
+
+    op.create_index("ix_recordings_letter_id", "recordings", ["letter_id"])
+    op.drop_index("ix_recordings_user_letter", table_name="recordings")
+
+    op.create_index("ix_checkins_date", "checkins", ["date"])
+    op.drop_constraint("uq_checkin_user_date", "checkins", type_="unique")
+    op.alter_column(
+        "checkins", "date",
+        type_=sa.String(10), nullable=True, postgresql_using="to_char(date, 'YYYY-MM-DD')",
+    )
+
+    op.create_index("ix_progress_letter_id", "progress", ["letter_id"])
+    op.drop_constraint("uq_progress_user_letter", "progress", type_="unique")
@@ -0,0 +1,39 @@
+"""按内容寻址的录音存储
+
+audio_blobs 记录每个录音文件的存储键与引用计数。
+已有的录音仍是 uploads/audio 下的平铺文件，继续按原路径读取，不需要迁移数据。
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17 00:00:02
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0003"
+down_revision: Union[str, Sequence[str], None] = "0002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """升级"""
+    if "audio_blobs" in sa.inspect(op.get_bind()).get_table_names():
+        return
+    op.create_table(
+        "audio_blobs",
+        sa.Column("key", sa.String(100), primary_key=True),
+        sa.Column("size", sa.Integer(), nullable=False),
+        sa.Column("ref_count", sa.Integer(), server_default="0", nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+
+
+def downgrade() -> None:
+    """回退"""
+    op.drop_table("audio_blobs")
@@ -0,0 +1,43 @@
+"""
+重建用户学习统计汇总（user_stats 表）
+
+首次上线统计汇总表后回填已有数据，或怀疑汇总与明细不一致时修复。
+
+使用方法：
+python rebuild_stats.py            # 重建所有用户
+python rebuild_stats.py 42         # 只重建用户ID为42的用户
+"""
+
+import asyncio
+import sys
+
+from sqlalchemy import func, select
+
+from app.db.database import AsyncSessionLocal, engine
+from app.db.migrate import run_migrations
+from app.models.models import UserStats
+from app.services.user_stats import rebuild_user_stats
+
+
+async def rebuild(user_id=None):
+    # 新表尚未创建时先迁移
+    await run_migrations()
+
+    async with AsyncSessionLocal() as db:
+        if user_id is None:
+            print("正在重建所有用户的统计汇总...")
+        else:
+            print(f"正在重建用户 {user_id} 的统计汇总...")
+        await rebuild_user_stats(db, user_id)
+        await db.commit()
+
+        result = await db.execute(select(func.count()).select_from(UserStats))
+        print(f"完成，当前共有 {result.scalar_one()} 条汇总记录")
+
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    if sys.platform == 'win32':
+        asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
+    asyncio.run(rebuild(int(sys.argv[1]) if len(sys.argv) > 1 else None))
@@ -0,0 +1,126 @@
+"""
+检查各接口的热点查询是否走索引
+
+对每条查询执行 EXPLAIN，确认用到了预期的索引（upsert 检查冲突判定索引），
+且没有对该表做全表扫描或额外排序。测试库数据很少时优化器倾向全表扫描或位图扫描
+（位图扫描不保持索引顺序，之后还要排序），因此在事务内关闭 enable_seqscan 和
+enable_bitmapscan，只检查索引扫描是否“可用”、能否直接按索引顺序返回。
+
+使用方法（需要可连接的 PostgreSQL，会先把库迁移到最新版本）：
+python test_query_plans.py
+"""
+
+import asyncio
+import sys
+from datetime import date
+
+from sqlalchemy import desc, select, text
+from sqlalchemy.dialects.postgresql import insert
+
+from app.db.database import engine
+from app.db.migrate import run_migrations
+from app.models.models import Checkin, Progress, Recording, SyncReceipt, User, UserStats
+from app.routers.progress import _checkin_upsert, _progress_upsert
+from app.schemas.schemas import ProgressDelta
+
+USER_ID = 1
+
+# (接口, 查询, 可接受的索引, 不应出现的计划节点)
+CASES = [
+    ("登录校验（按用户 ID）", select(User).where(User.id == USER_ID), ("users_pkey", "ix_users_id"), ()),
+    ("POST /auth/login", select(User).where(User.nickname == "test"), ("ix_users_nickname",), ()),
+    (
+        "GET /progress/",
+        select(Progress).where(Progress.user_id == USER_ID),
+        ("uq_progress_user_letter",),
+        (),
+    ),
+    (
+        "POST /progress/update",
+        _progress_upsert(USER_ID, [ProgressDelta(letter_id=1, stage=1, score=1)]),
+        ("uq_progress_user_letter",),
+        (),
+    ),
+    (
+        "POST /progress/checkin",
+        _checkin_upsert(USER_ID, [(date.today(), 1)]),
+        ("uq_checkin_user_date",),
+        (),
+    ),
+    (
+        "GET /progress/checkins",
+        select(Checkin).where(Checkin.user_id == USER_ID).order_by(desc(Checkin.date)).limit(30),
+        ("uq_checkin_user_date",),
+        ("Sort",),
+    ),
+    (
+        "POST /progress/sync（幂等键）",
+        insert(SyncReceipt)
+        .values(user_id=USER_ID, idempotency_key="k")
+        .on_conflict_do_nothing(index_elements=[SyncReceipt.user_id, SyncReceipt.idempotency_key]),
+        ("uq_sync_receipt_user_key",),
+        (),
+    ),
+    ("GET /progress/stats", select(UserStats).where(UserStats.user_id == USER_ID), ("user_stats_pkey",), ()),
+    (
+        "POST /speech/save",
+        select(Recording).where(Recording.user_id == USER_ID, Recording.letter_id == 1),
+        ("ix_recordings_user_letter",),
+        (),
+    ),
+]
+
+
+def _walk(plan):
+    yield plan
+    for child in plan.get("Plans", []):
+        yield from _walk(child)
+
+
+async def explain(conn, stmt):
+    compiled = stmt.compile(dialect=conn.dialect)
+    params = compiled.construct_params()
+    args = tuple(params[name] for name in compiled.positiontup)
+    result = await conn.exec_driver_sql("EXPLAIN (FORMAT JSON) " + compiled.string, args)
+    return result.scalar_one()[0]["Plan"]
+
+
+async def test_query_plans():
+    print("正在迁移数据库到最新版本...")
+    await run_migrations()
+
+    failures = 0
+    async with engine.connect() as conn:
+        await conn.execute(text("SET enable_seqscan = off"))
+        await conn.execute(text("SET enable_bitmapscan = off"))
+        for name, stmt, indexes, forbidden in CASES:
+            nodes = list(_walk(await explain(conn, stmt)))
+            used = {n.get("Index Name") for n in nodes}
+            for n in nodes:
+                used.update(n.get("Conflict Arbiter Indexes", []))
+            problems = []
+            if not used & set(indexes):
+                problems.append(f"未使用索引 {' / '.join(indexes)}")
+            for n in nodes:
+                if n["Node Type"] == "Seq Scan":
+                    problems.append(f"全表扫描 {n['Relation Name']}")
+                elif n["Node Type"] in forbidden:
+                    problems.append(f"出现 {n['Node Type']} 节点")
+            if problems:
+                failures += 1
+                print(f"❌ {name}: {'；'.join(problems)}")
+            else:
+                print(f"✅ {name}: {', '.join(sorted(used & set(indexes)))}")
+        await conn.rollback()
+    await engine.dispose()
+
+    if failures:
+        print(f"FAILURE: {failures} 条查询没有按预期走索引")
+        sys.exit(1)
+    print("SUCCESS: 所有查询都走了预期的索引")
+
+
+if __name__ == "__main__":
+    if sys.platform == 'win32':
+        asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
+    asyncio.run(test_query_plans())
@@ -0,0 +1,123 @@
+"""
+检查录音转码后，保存接口返回的原地址仍可播放
+
+保存一条 WAV 录音，等后台转码完成（记录已指向 Opus 文件）后，按 /save 返回的
+file_url 取回录音，应仍是原文件；队列停止后宽限期内的原文件被回收，原地址返回 404。
+
+使用方法（需要可连接的 PostgreSQL，会先把库迁移到最新版本；需要 PyAV）：
+python test_transcode_playback.py
+"""
+
+import asyncio
+import io
+import math
+import random
+import struct
+import sys
+import uuid
+import wave
+
+import httpx
+from sqlalchemy import select
+
+from app.db.database import AsyncSessionLocal, engine
+from app.db.migrate import run_migrations
+from app.main import app
+from app.models.models import Recording
+from app.services.transcode_queue import close_transcode_queue, get_transcode_queue
+
+
+def make_wav(seconds: float = 2.0, rate: int = 16000) -> bytes:
+    """随机频率的正弦波，未压缩 PCM，转码后一定更小；每次内容不同，不会与以前保存的录音去重"""
+    freq = random.uniform(200, 800)
+    frames = b"".join(
+        struct.pack("<h", int(8000 * math.sin(2 * math.pi * freq * i / rate)))
+        for i in range(int(seconds * rate))
+    )
+    buf = io.BytesIO()
+    with wave.open(buf, "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(rate)
+        w.writeframes(frames)
+    return buf.getvalue()
+
+
+async def test_transcode_playback():
+    print("正在迁移数据库到最新版本...")
+    await run_migrations()
+    queue = get_transcode_queue()
+    if queue is None:
+        print("FAILURE: 未开启转码（AUDIO_TRANSCODE_ENABLED=false）")
+        sys.exit(1)
+    if queue.source_grace <= 0:
+        print("FAILURE: AUDIO_TRANSCODE_SOURCE_GRACE 须大于 0")
+        sys.exit(1)
+    queue.start()
+
+    failures = 0
+    audio = make_wav()
+    transport = httpx.ASGITransport(app=app)
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            nickname = f"transcode-{uuid.uuid4().hex[:8]}"
+            resp = await client.post("/api/auth/register", json={"nickname": nickname, "password": "secret123"})
+            resp.raise_for_status()
+            resp = await client.post("/api/auth/login", data={"username": nickname, "password": "secret123"})
+            resp.raise_for_status()
+            client.headers["Authorization"] = f"Bearer {resp.json()['access_token']}"
+
+            resp = await client.post(
+                "/api/speech/save",
+                data={"letter": "A", "score": "3"},
+                files={"audio": ("recording.wav", audio, "audio/wav")},
+            )
+            resp.raise_for_status()
+            saved = resp.json()
+            print(f"保存录音: {saved['file_url']}")
+
+            await queue.join()
+            async with AsyncSessionLocal() as db:
+                current_url = (await db.execute(
+                    select(Recording.file_url).where(Recording.id == saved["id"])
+                )).scalar_one()
+            if current_url == saved["file_url"]:
+                print(f"FAILURE: 录音没有被转码（{queue.stats()}）")
+                sys.exit(1)
+            print(f"转码完成: {current_url}")
+
+            resp = await client.get(saved["file_url"])
+            if resp.status_code == 200 and resp.content == audio:
+                print("✅ 转码后原地址仍可播放")
+            else:
+                print(f"❌ 转码后原地址返回 {resp.status_code}")
+                failures += 1
+
+            resp = await client.get(current_url)
+            if resp.status_code == 200 and resp.content:
+                print("✅ 转码后的新地址可播放")
+            else:
+                print(f"❌ 新地址返回 {resp.status_code}")
+                failures += 1
+
+            await close_transcode_queue()
+            resp = await client.get(saved["file_url"])
+            if resp.status_code == 404:
+                print("✅ 队列停止后原文件已回收")
+            else:
+                print(f"❌ 队列停止后原地址返回 {resp.status_code}")
+                failures += 1
+    finally:
+        await close_transcode_queue()
+        await engine.dispose()
+
+    if failures:
+        print(f"FAILURE: {failures} 项检查未通过")
+        sys.exit(1)
+    print("SUCCESS: 转码后原地址在宽限期内仍可播放")
+
+
+if __name__ == "__main__":
+    if sys.platform == 'win32':
+        asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
+    asyncio.run(test_transcode_playback())
@@ -28,5 +28,12 @@ export const progressAPI = {
   // 获取统计信息
   getStats() {
     return http.get('/api/progress/stats')
+  },
+
+  // 批量同步离线期间的进度与打卡
+  // progress: [{ letter_id, stage, score, client_ts, idempotency_key }]
+  // checkins: [{ client_ts, idempotency_key }]
+  sync(progress = [], checkins = []) {
+    return http.post('/api/progress/sync', { progress, checkins })
   }
 }
@@ -14,6 +14,20 @@ export const speechAPI = {
     })
   },
 
+  // 评估并保存录音（一次上传），返回 { score, accuracy, feedback, recording }
+  // recording 为空表示录音保存失败，评分仍然有效
+  evaluateAndSave(letter, audioBlob) {
+    const formData = new FormData()
+    formData.append('letter', letter)
+    formData.append('audio', audioBlob)
+
+    return http.post('/api/speech/evaluate-and-save', formData, {
+      headers: {
+        'Content-Type': 'multipart/form-data'
+      }
+    })
+  },
+
   // 保存录音
   saveRecording(letter, audioBlob, score = 0) {
     const formData = new FormData()
@@ -26,5 +40,53 @@ export const speechAPI = {
         'Content-Type': 'multipart/form-data'
       }
     })
+  },
+
+  // 流式评估：边录边传，说完即出结果
+  // format: 'webm' / 'ogg' / 'mp4'（MediaRecorder 分片）或 'pcm_s16le'
+  // 返回 { send(chunk), end(), close(), result }，result 为最终评分的 Promise
+  openStream(letter, { format = 'webm', sampleRate = 16000, onPartial } = {}) {
+    const base =
+      (import.meta.env.VITE_API_BASE || '').replace(/\/$/, '') || window.location.origin
+    const url = new URL('/api/speech/stream', base)
+    url.protocol = url.protocol === 'https:' ? 'wss:' : 'ws:'
+    url.searchParams.set('token', localStorage.getItem('token') || '')
+
+    const ws = new WebSocket(url)
+    const queued = []
+    const send = (data) => {
+      if (ws.readyState === WebSocket.CONNECTING) {
+        queued.push(data)
+      } else if (ws.readyState === WebSocket.OPEN) {
+        ws.send(data)
+      }
+    }
+
+    ws.onopen = () => {
+      ws.send(JSON.stringify({ letter, format, sample_rate: sampleRate }))
+      queued.splice(0).forEach((data) => ws.send(data))
+    }
+
+    const result = new Promise((resolve, reject) => {
+      ws.onmessage = (event) => {
+        const message = JSON.parse(event.data)
+        if (message.type === 'partial') {
+          onPartial?.(message)
+        } else if (message.type === 'final') {
+          resolve(message)
+        } else if (message.type === 'error') {
+          reject(new Error(message.detail))
+        }
+      }
+      // 收到最终结果后的关闭不影响已完成的 Promise
+      ws.onclose = (event) => reject(new Error(`连接已关闭 (${event.code})`))
+    })
+
+    return {
+      send,
+      end: () => send(JSON.stringify({ type: 'end' })),
+      close: () => ws.close(),
+      result
+    }
   }
 }